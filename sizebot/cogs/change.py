@@ -3,207 +3,311 @@ from discord.ext import commands
 
 from sizebot.globalsb import *
 import sizebot.digilogger as logger
+from sizebot.precision import FAST, HIGH
+from sizebot.sizeparser import parseHeight, SizeParseError
+from sizebot.scheduler import Job, Scheduler
+from sizebot.cogs.stats import fancyFormat
+
+
+# Most slow changes &slowchanges will list.
+maxslowchanges = 20
+
+
+addstyles = ["a", "+", "add"]
+substyles = ["s", "-", "sub", "subtract"]
+multstyles = ["m", "*", "x", "mult", "multiply"]
+divstyles = ["d", "/", "div", "divide"]
+changestyles = addstyles + substyles + multstyles + divstyles
+# Styles that can go right in front of their amount, like x2 or +1ft.
+changesymbols = "+-*x/"
+
+
+def parseChange(style, amount):
+    """(kind, amount) for a change style and amount, where kind is "add", "multiply" or "divide".
+
+    Subtracting is turned into adding a negative amount. Raises ValueError for an unknown style, and SizeParseError
+    for an amount that isn't a finite size, or a factor that isn't a finite number above zero."""
+    style = style.lower()
+    if style in addstyles or style in substyles:
+        # A signed amount, like `a -1ft`, flips the direction.
+        sign = amount.lstrip()[:1]
+        size = parseHeight(amount.lstrip()[1:] if sign in ("+", "-") else amount)
+        if not size.is_finite():
+            raise SizeParseError(amount, "Not a finite size")
+        if (style in substyles) != (sign == "-"):
+            size = -size
+        return "add", size
+    if style not in changestyles:
+        raise ValueError(f"Unknown change style {style!r}")
+    try:
+        factor = Decimal(amount.replace(",", ""))
+    except InvalidOperation:
+        raise SizeParseError(amount, "Not a number")
+    if not factor.is_finite():
+        raise SizeParseError(amount, "Not a finite number")
+    if style in multstyles:
+        if factor <= 0:
+            raise SizeParseError(amount, "Can't multiply by zero or less")
+        return "multiply", factor
+    if factor <= 0:
+        raise SizeParseError(amount, "Can't divide by zero or less")
+    return "divide", factor
+
+
+def isSymbolStep(word):
+    if word[0] not in changesymbols:
+        return False
+    # x on its own or in front of a number, not the start of some other word.
+    return word[0] != "x" or len(word) == 1 or word[1].isdigit() or word[1] == "."
+
+
+def parseChangeExpression(expression):
+    """A list of (kind, amount) steps from a chain of changes, like `x2 +1ft /3`.
+
+    The old `<style> <amount>` form, like `a 5ft 3in` or `m 2`, is a chain of one step."""
+    words = expression.split()
+    steps = []
+    if words and words[0].lower() in changestyles:
+        steps.append([words.pop(0), []])
+    for word in words:
+        # A sign right after a style that's still waiting for its amount is part of that amount, like `a -1ft`.
+        signedamount = word[0] in "+-" and steps and not steps[-1][1]
+        if isSymbolStep(word) and not signedamount:
+            steps.append([word[0], [word[1:]] if len(word) > 1 else []])
+        elif steps:
+            steps[-1][1].append(word)
+        else:
+            raise ValueError(f"Expected a change style, not {word!r}")
+    if not steps:
+        raise ValueError("No changes given")
+    return [parseChange(style, " ".join(amount)) for style, amount in steps]
+
+
+def applyChanges(height, steps):
+    """(new height, whether it had to be capped at infinity) after each step in turn.
+
+    The chain is worked out at HIGH and only capped at the end, so x1e100 /1e100 gives back the height it started at."""
+    try:
+        with localcontext(HIGH):
+            for kind, amount in steps:
+                if kind == "add":
+                    height = height + amount
+                elif kind == "multiply":
+                    height = height * amount
+                else:
+                    height = height / amount
+    except Overflow:
+        # Past anything Decimal can hold, so no later step is bringing it back down.
+        return infinity, True
+    if height > infinity:
+        return infinity, True
+    return FAST.plus(height), False
+
+
+# How often a slow change's height is saved, in seconds. In between, it's only worked out when read.
+slowchangecheckpoint = 60 * 60
+
+
+def describeSlowChange(state):
+    if state.kind == "add":
+        sign = "+" if state.amount >= 0 else "-"
+        return f"{sign}{fromSV(abs(state.amount))}"
+    if state.kind == "divide":
+        return f"/{fancyFormat(state.amount)}"
+    return f"x{fancyFormat(state.amount)}"
+
+
+class SlowChange(Job):
+    """Tells a slow-changing user about each step of their slow change (see globalsb.slowchangestates)."""
+    __slots__ = ["member", "channel"]
+
+    def __init__(self, member, channel, interval):
+        super().__init__(str(member.id), interval)
+        self.member = member
+        self.channel = channel
+
+
+async def slowChangeStep(job):
+    state = slowchangestates.get(job.key)
+    if state is None or not user_exists(job.key):
+        slowchanges.remove(job.key)
+        return
+    # Already includes this step.
+    userdata = await store.get(job.key)
+    if userdata.height >= infinity:
+        logger.warn("Invalid size value.")
+        await job.channel.send("Too big. x_x", delete_after=3)
+        slowchanges.remove(job.key)
+        await stopSlowChange(job.key)
+    elif time.time() - state.starttime >= slowchangecheckpoint:
+        await saveSlowChange(job.key)
+    else:
+        # Keep the leaderboards up to date without a write.
+        indexUser(job.key, userdata)
+    if userdata.display:
+        await nickupdate(job.member)
+    await job.channel.send("""{0} is now {1} tall. ({2})""".format(job.member.name, fromSV(userdata.height), fromSVUSA(userdata.height)), delete_after = 5) #Add comp to base.
+
+
+async def slowChangeBatch(jobs):
+    results = await asyncio.gather(*(slowChangeStep(job) for job in jobs), return_exceptions=True)
+    for job, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            logger.crit(f"Slow change for {job.key} failed: {result!r}")
+
+
+# Every user's slow change, run from one task.
+slowchanges = Scheduler(slowChangeBatch)
+
 
 class ChangeCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    # TODO: This isn't very clean.
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Slow changes picked back up at startup (see globalsb.loadSlowChanges) need telling about their steps again.
+        now = time.time()
+        for userid, state in list(slowchangestates.items()):
+            if userid in slowchanges:
+                continue
+            spec = jobstore.get(slowChangeKey(userid)) or {}
+            guild = self.bot.get_guild(spec.get("guildid"))
+            channel = self.bot.get_channel(spec.get("channelid"))
+            member = guild and guild.get_member(int(userid))
+            if channel is None or member is None:
+                logger.warn(f"Can't find where to post slow change steps for {userid}, carrying on quietly.")
+                continue
+            delay = state.nextStep(now) - now + slowchanges.batchwindow
+            slowchanges.add(SlowChange(member, channel, state.period), delay=delay)
+
     @commands.command()
-    async def change(self, ctx, style, *, amount):
-        logger.msg(f"User {ctx.message.author.id} ({ctx.message.author.nick}) changed {style}-style {amount}.")
+    async def change(self, ctx, *, expression):
+        logger.msg(f"User {ctx.message.author.id} ({ctx.message.author.nick}) changed {expression}.")
         #Change height.
-        if not os.path.exists(folder + '/users/' + str(ctx.message.author.id) + '.txt'):
+        if not user_exists(ctx.message.author.id):
         #User file missing.
             await ctx.send("""Sorry! You aren't registered with SizeBot.
     To register, use the `&register` command.""", delete_after=5)
-        elif style == "a" or style == "+" or style == "add":
-            amount = isFeetAndInchesAndIfSoFixIt(amount)
-            userarray = read_user(ctx.message.author.id)
-            userarray[CHEI] = str(Decimal(userarray[CHEI]) + Decimal(toSV(getnum(amount), getlet(amount)))) + newline
-            if (float(userarray[CHEI]) > infinity):
-                logger.warn("Invalid size value.")
-                await ctx.send("Too big. x_x", delete_after=3)
-                userarray[CHEI] = str(infinity) + newline
-            write_user(ctx.message.author.id, userarray)
-            userarray = read_user(ctx.message.author.id)
-            if userarray[DISP] == "Y\n":
-                await nickupdate(ctx.message.author)
-            await ctx.send("""<@{0}> is now {1} tall. ({2})""".format(ctx.message.author.id, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI]))) #Add comp to base.
-        elif style == "m" or style == "*" or style == "x" or style == "mult" or style == "multiply":
-            userarray = read_user(ctx.message.author.id)
-            userarray[CHEI] = str(Decimal(userarray[CHEI]) * Decimal(amount)) + newline
-            if (float(userarray[CHEI]) > infinity):
-                logger.warn("Invalid size value.")
-                await ctx.send("Too big. x_x", delete_after=3)
-                userarray[CHEI] = str(infinity) + newline
-            write_user(ctx.message.author.id, userarray)
-            userarray = read_user(ctx.message.author.id)
-            if userarray[DISP] == "Y\n":
-                await nickupdate(ctx.message.author)
-                await ctx.send("""<@{0}> is now {1} tall. ({2})""".format(ctx.message.author.id, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI]))) #Add comp to base.
-        elif style == "s" or style == "-" or style == "sub" or style == "subtract":
-            amount = isFeetAndInchesAndIfSoFixIt(amount)
-            userarray = read_user(ctx.message.author.id)
-            userarray[CHEI] = str(Decimal(userarray[CHEI]) - (toSV(getnum(amount), getlet(amount))))
-            if (float(userarray[CHEI]) > infinity):
-                logger.warn("Invalid size value.")
-                await ctx.send("Too big. x_x", delete_after=3)
-                userarray[CHEI] = str(infinity) + newline
-            write_user(ctx.message.author.id, userarray)
-            userarray = read_user(ctx.message.author.id)
-            if userarray[DISP] == "Y\n":
-                await nickupdate(ctx.message.author)
-                await ctx.send("""<@{0}> is now {1} tall. ({2})""".format(ctx.message.author.id, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI]))) #Add comp to base.
-        elif style == "d" or style == "/" or style == "div" or style == "divide":
-            userarray = read_user(ctx.message.author.id)
-            userarray[CHEI] = str(Decimal(userarray[CHEI]) / Decimal(amount))
-            if (float(userarray[CHEI]) > infinity):
-                logger.warn("Invalid size value.")
-                await ctx.send("Too big. x_x", delete_after=3)
-                userarray[CHEI] = str(infinity) + newline
-            write_user(ctx.message.author.id, userarray)
-            userarray = read_user(ctx.message.author.id)
-            if userarray[DISP] == "Y\n":
-                await nickupdate(ctx.message.author)
-                await ctx.send("""<@{0}> is now {1} tall. ({2})""".format(ctx.message.author.id, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI]))) #Add comp to base.
-        else:
+            return
+        try:
+            steps = parseChangeExpression(expression)
+        except SizeParseError as e:
+            await ctx.send(f"{e}.", delete_after=3)
+            return
+        except ValueError:
             await ctx.send("Please enter a valid change method.", delete_after=3)
             return
 
+        # The whole chain is worked out here, then saved and shown once.
+        async with store.lock(ctx.message.author.id):
+            userdata = await store.get(ctx.message.author.id)
+            userdata.height, toobig = applyChanges(userdata.height, steps)
+            await store.put(ctx.message.author.id, userdata)
+        if toobig:
+            logger.warn("Invalid size value.")
+            await ctx.send("Too big. x_x", delete_after=3)
+        if userdata.display:
+            await nickupdate(ctx.message.author)
+        await ctx.send("""<@{0}> is now {1} tall. ({2})""".format(ctx.message.author.id, fromSV(userdata.height), fromSVUSA(userdata.height))) #Add comp to base.
+
     @commands.command()
     async def slowchange(self, ctx, style : str, amount : str, delay : float):
         logger.msg(f"User {ctx.message.author.id} ({ctx.message.author.nick}) slow-changed {style}-style {amount} every {delay} minutes.")
-        async def slowchangetask(ctx, style, amount, delay):
-            #Change height.
-            if not os.path.exists(folder + '/users/' + str(ctx.message.author.id) + '.txt'):
-            #User file missing.
-                await ctx.send("""Sorry! You aren't registered with SizeBot.
-        To register, use the `&register` command.""", delete_after=5)
-            elif style == "a" or style == "+" or style == "add":
-                while True:
-                    amount = isFeetAndInchesAndIfSoFixIt(amount)
-                    userarray = read_user(ctx.message.author.id)
-                    userarray[CHEI] = str(Decimal(userarray[CHEI]) + Decimal(toSV(getnum(amount), getlet(amount)))) + newline
-                    if (float(userarray[CHEI]) > infinity):
-                        logger.warn("Invalid size value.")
-                        await ctx.send("Too big. x_x", delete_after=3)
-                        userarray[CHEI] = str(infinity) + newline
-                        tasks[ctx.message.author.id].cancel()
-                        del tasks[ctx.message.author.id]
-                    write_user(ctx.message.author.id, userarray)
-                    userarray = read_user(ctx.message.author.id)
-                    if userarray[DISP] == "Y\n":
-                        await nickupdate(ctx.message.author)
-                    await ctx.send("""<@{0}> is now {1} tall. ({2})""".format(ctx.message.author.id, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI])), delete_after = 5) #Add comp to base.
-                    await asyncio.sleep(delay * 60)
-            elif style == "m" or style == "*" or style == "x" or style == "mult" or style == "multiply":
-                while True:
-                    userarray = read_user(ctx.message.author.id)
-                    userarray[CHEI] = str(Decimal(userarray[CHEI]) * Decimal(amount)) + newline
-                    if (float(userarray[CHEI]) > infinity):
-                        logger.warn("Invalid size value.")
-                        await ctx.send("Too big. x_x", delete_after=3)
-                        uuserarray[CHEI] = str(infinity) + newline
-                        tasks[ctx.message.author.id].cancel()
-                        del tasks[ctx.message.author.id]
-                    write_user(ctx.message.author.id, userarray)
-                    userarray = read_user(ctx.message.author.id)
-                    if userarray[DISP] == "Y\n":
-                        await nickupdate(ctx.message.author)
-                        await ctx.send("""{0} is now {1} tall. ({2})""".format(ctx.message.author.name, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI])), delete_after = 5) #Add comp to base.
-                        await asyncio.sleep(delay * 60)
-            elif style == "s" or style == "-" or style == "sub" or style == "subtract":
-                while True:
-                    amount = isFeetAndInchesAndIfSoFixIt(amount)
-                    userarray = read_user(ctx.message.author.id)
-                    userarray[CHEI] = str(Decimal(userarray[CHEI]) - (toSV(getnum(amount), getlet(amount))))
-                    write_user(ctx.message.author.id, userarray)
-                    userarray = read_user(ctx.message.author.id)
-                    if userarray[DISP] == "Y\n":
-                        await nickupdate(ctx.message.author)
-                        await ctx.send("""{0} is now {1} tall. ({2})""".format(ctx.message.author.name, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI])), delete_after = 5) #Add comp to base.
-                        await asyncio.sleep(delay * 60)
-            elif style == "d" or style == "/" or style == "div" or style == "divide":
-                while True:
-                    userarray = read_user(ctx.message.author.id)
-                    userarray[CHEI] = str(Decimal(userarray[CHEI]) / Decimal(amount))
-                    write_user(ctx.message.author.id, userarray)
-                    userarray = read_user(ctx.message.author.id)
-                    if userarray[DISP] == "Y\n":
-                        await nickupdate(ctx.message.author)
-                        await ctx.send("""{0} is now {1} tall. ({2})""".format(ctx.message.author.name, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI])), delete_after = 5) #Add comp to base.
-                        await asyncio.sleep(delay * 60)
-            else:
-                await ctx.send("Please enter a valid change style.", delete_after=3)
-        bot = self.bot
+        if not user_exists(ctx.message.author.id):
+        #User file missing.
+            await ctx.send("""Sorry! You aren't registered with SizeBot.
+    To register, use the `&register` command.""", delete_after=5)
+            return
         try:
-            tasks[ctx.message.author.id].cancel()
-            del tasks[ctx.message.author.id]
-        except:
-            pass
-        task = bot.loop.create_task(slowchangetask(ctx, style, amount, delay))
-        tasks[ctx.message.author.id] = task
+            kind, amountvalue = parseChange(style, amount)
+        except SizeParseError as e:
+            await ctx.send(f"{e}.", delete_after=3)
+            return
+        except ValueError:
+            await ctx.send("Please enter a valid change style.", delete_after=3)
+            return
+        if delay <= 0:
+            await ctx.send("The delay must be more than zero minutes.", delete_after=3)
+            return
+
+        # Replaces any slow change they already had going.
+        await startSlowChange(ctx.message.author.id, kind, amountvalue, delay * 60, ctx.guild.id, ctx.channel.id)
+        # The scheduler may run jobs up to a batch window early, so make sure each step has happened first.
+        slowchanges.add(SlowChange(ctx.message.author, ctx.channel, delay * 60), delay=slowchanges.batchwindow)
 
     @commands.command()
     async def stopchange(self, ctx):
         logger.msg(f"User {ctx.message.author.id} ({ctx.message.author.nick}) stopped slow-changing.")
-        try:
-            tasks[ctx.message.author.id].cancel()
-            del tasks[ctx.message.author.id]
-        except:
+        slowchanges.remove(str(ctx.message.author.id))
+        if not await stopSlowChange(ctx.message.author.id):
             await ctx.send("You can't stop slow-changing, as you don't have a task active!")
             logger.warn(f"User {ctx.message.author.id} ({ctx.message.author.nick}) tried to stop slow-changing, but there didn't have a task active.")
 
+    @commands.command()
+    async def slowchanges(self, ctx):
+        jobs = slowchanges.upcoming()
+        if not jobs:
+            await ctx.send("Nobody is slow-changing right now.")
+            return
+        now = asyncio.get_event_loop().time()
+        lines = [f"**{len(jobs)} slow changes active:**"]
+        for job in jobs[:maxslowchanges]:
+            state = slowchangestates.get(job.key)
+            if state is None:
+                continue
+            lines.append(f"{job.member.display_name}: {describeSlowChange(state)} every {pretty_time_delta(job.interval)}, next in {pretty_time_delta(max(job.due - now, 0))}")
+        if len(jobs) > maxslowchanges:
+            lines.append(f"...and {len(jobs) - maxslowchanges} more.")
+        await ctx.send("\n".join(lines))
+
     @commands.command()
     async def eatme(self, ctx):
         #Eat me!
-        if not os.path.exists(folder + '/users/' + str(ctx.message.author.id) + '.txt'):
+        if not user_exists(ctx.message.author.id):
         #User file missing.
             await ctx.send("""Sorry! You aren't registered with SizeBot.
     To register, use the `&register` command.""", delete_after=5)
         else:
-            userarray = read_user(ctx.message.author.id)
-            randmult = round(random.random(2, 20), 1)
-            newheight = float(userarray[CHEI]) * randmult
-            userarray[CHEI] = str(newheight) + newline
-            if (float(userarray[CHEI]) > infinity):
-                logger.warn("Invalid size value.")
-                await ctx.send("Too big. x_x", delete_after=3)
-                userarray[CHEI] = str(infinity) + newline
-            write_user(ctx.message.author.id, userarray)
-            userarray = read_user(ctx.message.author.id)
-            if userarray[DISP] == "Y\n":
+            async with store.lock(ctx.message.author.id):
+                userdata = await store.get(ctx.message.author.id)
+                randmult = round(Decimal(random.uniform(2, 20)), 1)
+                userdata.height = userdata.height * randmult
+                if userdata.height > infinity:
+                    logger.warn("Invalid size value.")
+                    await ctx.send("Too big. x_x", delete_after=3)
+                    userdata.height = infinity
+                await store.put(ctx.message.author.id, userdata)
+            if userdata.display:
                 await nickupdate(ctx.message.author)
             logger.msg(f"User {ctx.message.author.id} ({ctx.message.author.nick}) ate a cake and multiplied {randmult}.")
             #TODO: Randomize the italics message here.
             await ctx.send("""<@{0}> ate a :cake:! *I mean it said "Eat me..."*
-They multiplied {1}x and are now {2} tall. ({3})""".format(ctx.message.author.id, randmult, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI])))
+They multiplied {1}x and are now {2} tall. ({3})""".format(ctx.message.author.id, randmult, fromSV(userdata.height), fromSVUSA(userdata.height)))
 
     @commands.command()
     async def drinkme(self, ctx):
         #Drink me!
-        if not os.path.exists(folder + '/users/' + str(ctx.message.author.id) + '.txt'):
+        if not user_exists(ctx.message.author.id):
         #User file missing.
             await ctx.send("""Sorry! You aren't registered with SizeBot.
     To register, use the `&register` command.""", delete_after=5)
         else:
-            userarray = read_user(ctx.message.author.id)
-            randmult = round(random.random(2, 20), 1)
-            newheight = float(userarray[CHEI]) / randmult
-            userarray[CHEI] = str(newheight) + newline
-            if (float(userarray[CHEI]) > infinity):
-                logger.warn("Invalid size value.")
-                await ctx.send("Too big. x_x", delete_after=3)
-                userarray[CHEI] = str(infinity) + newline
-            write_user(ctx.message.author.id, userarray)
-            userarray = read_user(ctx.message.author.id)
-            if userarray[DISP] == "Y\n":
+            async with store.lock(ctx.message.author.id):
+                userdata = await store.get(ctx.message.author.id)
+                randmult = round(Decimal(random.uniform(2, 20)), 1)
+                userdata.height = userdata.height / randmult
+                if userdata.height > infinity:
+                    logger.warn("Invalid size value.")
+                    await ctx.send("Too big. x_x", delete_after=3)
+                    userdata.height = infinity
+                await store.put(ctx.message.author.id, userdata)
+            if userdata.display:
                 await nickupdate(ctx.message.author)
             logger.msg(f"User {ctx.message.author.id} ({ctx.message.author.nick}) drank a potion and divided {randmult}.")
             #TODO: Randomize the italics message here.
             await ctx.send("""<@{0}> drank a :shrinkpotion:! *What harm could a drink do?*
-They shrunk {1}x and are now {2} tall. ({3})""".format(ctx.message.author.id, randmult, fromSV(userarray[CHEI]), fromSVUSA(userarray[CHEI])))
+They shrunk {1}x and are now {2} tall. ({3})""".format(ctx.message.author.id, randmult, fromSV(userdata.height), fromSVUSA(userdata.height)))
 
 
 
@@ -10,6 +10,7 @@ from discord.ext import commands
 import sizebot.digilogger as logger
 from sizebot import utils
 from sizebot import globalsb
+from sizebot.resync import Resync
 
 emojis = {
     "loading": "Loading...",
@@ -207,6 +208,31 @@ class EvalCog(commands.Cog):
                 logger.crit("eval error:\n" + utils.formatTraceback(err))
                 await ctx.message.author.send("**!**" + f" ` {utils.formatError(err)} `")
 
+    @commands.command(
+        hidden = True
+    )
+    @commands.is_owner()
+    async def flush(self, ctx):
+        """Write all pending user changes to storage now."""
+        await globalsb.store.run(globalsb.writebehind.flush)
+        await ctx.send(f"Flushed. {globalsb.writebehind}")
+
+    @commands.command(
+        hidden = True
+    )
+    @commands.is_owner()
+    @commands.guild_only()
+    async def resync(self, ctx, fresh: str = None):
+        """Set every registered member's sizetag from their record, resuming an interrupted resync unless told `fresh`."""
+        job = Resync(ctx.guild)
+        progress = await ctx.send("Resyncing sizetags...")
+
+        async def report(job):
+            await progress.edit(content=f"Resyncing sizetags... {job}")
+
+        await job.run(report, fresh=(fresh == "fresh"))
+        await progress.edit(content=f"Resync done. {job}")
+
 
 def setup(bot):
     bot.add_cog(EvalCog(bot))
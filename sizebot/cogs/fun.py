@@ -3,6 +3,32 @@ from discord.ext import commands
 
 from sizebot.globalsb import *
 import sizebot.digilogger as logger
+from sizebot.scheduler import Job, Scheduler
+
+
+class Repeat(Job):
+    """A message posted in a channel every interval seconds."""
+    __slots__ = ["channel", "message"]
+
+    def __init__(self, userid, channel, message, interval):
+        super().__init__(str(userid), interval)
+        self.channel = channel
+        self.message = message
+
+
+def repeatKey(userid):
+    return f"repeat:{userid}"
+
+
+async def repeatBatch(jobs):
+    results = await asyncio.gather(*(job.channel.send(job.message) for job in jobs), return_exceptions=True)
+    for job, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            logger.crit(f"Repeat for {job.key} failed: {result!r}")
+
+
+# Every user's &repeat, run from one task.
+repeats = Scheduler(repeatBatch)
 
 
 # Commands for non-size stuff.
@@ -12,22 +38,47 @@ class FunCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Pick repeats back up after a restart, at the point they'd have got to.
+        # Missed repeats aren't posted; the next one goes out on schedule.
+        now = time.time()
+        for key, spec in jobstore.all():
+            if spec.get("type") != "repeat" or spec["userid"] in repeats:
+                continue
+            channel = self.bot.get_channel(spec["channelid"])
+            if channel is None:
+                logger.warn(f"Can't find channel {spec['channelid']} for {spec['userid']}'s repeat, dropping it.")
+                jobstore.delete(key)
+                continue
+            period = spec["period"]
+            sent = math.floor((now - spec["starttime"]) / period) + 1
+            delay = spec["starttime"] + sent * period - now
+            repeats.add(Repeat(spec["userid"], channel, spec["message"], period), delay=delay)
+
     @commands.command()
     async def repeat(self, ctx, delay: float, *, message: str):
         await ctx.message.delete()
+        if delay <= 0:
+            await ctx.send("The delay must be more than zero minutes.", delete_after=3)
+            return
 
-        async def repeattask():
-            while True:
-                await ctx.send(message)
-                await asyncio.sleep(delay * 60)
-        task = bot.loop.create_task(repeattask())
-        tasks[ctx.message.author.id] = task
+        # Replaces any repeat they already had going.
+        repeats.add(Repeat(ctx.message.author.id, ctx.channel, message, delay * 60))
+        jobstore.put(repeatKey(ctx.message.author.id), {
+            "type": "repeat",
+            "userid": str(ctx.message.author.id),
+            "channelid": ctx.channel.id,
+            "message": message,
+            "period": delay * 60,
+            "starttime": time.time()
+        })
 
     @commands.command()
     async def stoprepeat(self, ctx):
         await ctx.message.delete()
-        tasks[ctx.message.author.id].cancel()
-        del tasks[ctx.message.author.id]
+        repeats.remove(str(ctx.message.author.id))
+        jobstore.delete(repeatKey(ctx.message.author.id))
 
     @commands.command()
     async def say(self, ctx, *, message: str):
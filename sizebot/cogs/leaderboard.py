@@ -0,0 +1,108 @@
+from discord.ext import commands
+
+from sizebot.globalsb import store, user_exists, heightindex, multiplierindex, logheightindex, rankMultiplier, logSize, fromSV, fromSVUSA
+from sizebot.cogs.stats import get_user, fancyFormat
+import sizebot.digilogger as logger
+
+# Most users &leaderboard and &nearsize will list.
+maxleaderboard = 25
+
+
+async def nickname(userid):
+    """Their nickname, or None if they've unregistered since they were looked up."""
+    if not user_exists(userid):
+        return None
+    try:
+        user = await store.get(userid)
+    except FileNotFoundError:
+        return None
+    return user.nickname
+
+
+async def placings(entries):
+    """A numbered line for each (userid, height), leaving out anyone who's unregistered."""
+    lines = []
+    for userid, height in entries:
+        # No height if a worker thread unindexed them after they were looked up.
+        name = None if height is None else await nickname(userid)
+        if name is None:
+            continue
+        lines.append(f"{len(lines) + 1}. {name}: {fromSV(height)} / {fromSVUSA(height)}")
+    return lines
+
+
+def describeRank(index, value, what, comparative):
+    smaller, bigger, total = index.rank(value)
+    # Don't count the user against themselves.
+    others = total - 1 if (smaller + bigger) < total else total
+    percent = smaller / others * 100 if others else 100
+    return f"#{bigger + 1} of {total} in {what}, {comparative} than {percent:.1f}% of users"
+
+
+class LeaderboardCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command()
+    async def leaderboard(self, ctx, which: str = "tallest", n: int = 10):
+        which = which.lower()
+        if which not in ["tallest", "smallest"]:
+            await ctx.send("Please enter `&leaderboard <tallest/smallest> <n>`.", delete_after=5)
+            return
+        n = max(1, min(n, maxleaderboard))
+
+        if which == "tallest":
+            entries = heightindex.largest(n)
+        else:
+            entries = heightindex.smallest(n)
+
+        lines = await placings(entries)
+        lines.insert(0, f"**{which.capitalize()} {len(lines)} of {len(heightindex)} users:**")
+        await ctx.send("\n".join(lines))
+        logger.msg(f"Leaderboard ({which} {n}) sent.")
+
+    @commands.command()
+    async def rank(self, ctx, who: str = None):
+        if who is None:
+            who = str(ctx.message.author.id)
+
+        usertag, user = await get_user(ctx, who)
+        if user is None:
+            return
+
+        heightrank = describeRank(heightindex, user.height, "height", "taller")
+        if user.baseheight:
+            multiplier = rankMultiplier(user)
+            multiplierrank = describeRank(multiplierindex, multiplier, "multiplier", "bigger")
+            multiplierline = f"{usertag} is {fancyFormat(multiplier)}x character base: {multiplierrank}."
+        else:
+            multiplierline = f"{usertag} has no base height to rank a multiplier from."
+
+        await ctx.send(
+            f"{usertag} is {fromSV(user.height)} / {fromSVUSA(user.height)}: {heightrank}.\n"
+            f"{multiplierline}")
+        logger.msg(f"Rank for {who} sent.")
+
+    @commands.command()
+    async def nearsize(self, ctx, who: str = None, k: int = 5):
+        if who is None:
+            who = str(ctx.message.author.id)
+        k = max(1, min(k, maxleaderboard))
+
+        usertag, user = await get_user(ctx, who)
+        if user is None:
+            return
+
+        # A registered user shouldn't show up as their own nearest size.
+        exclude = usertag[2:-1] if usertag.startswith("<@") else None
+        nearest = logheightindex.nearest(logSize(user.height), k, exclude=exclude)
+
+        lines = await placings([(userid, heightindex.get(userid)) for userid, logheight in nearest])
+        lines.insert(0, f"**Closest {len(lines)} users to {usertag}'s size ({fromSV(user.height)} / {fromSVUSA(user.height)}):**")
+        await ctx.send("\n".join(lines))
+        logger.msg(f"Nearest sizes to {who} sent.")
+
+
+# Necessary.
+def setup(bot):
+    bot.add_cog(LeaderboardCog(bot))
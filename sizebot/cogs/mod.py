@@ -3,6 +3,12 @@ from discord.ext import commands
 
 from sizebot.globalsb import *
 import sizebot.digilogger as logger
+from sizebot.units import lengths, weights
+
+# Built once, from the same units toSV and toWV accept.
+heighttable = lengths.table()
+weighttable = weights.table()
+
 
 class ModCog(commands.Cog):
     def __init__(self, bot):
@@ -11,79 +17,12 @@ class ModCog(commands.Cog):
     @commands.command()
     async def heightunits(self, ctx):
         await ctx.message.delete()
-        await ctx.send("""<@{0}>, **Accepted Units**
-    *Height*
-    ```
-    ┌─────────────────────────┬───────────────────────────┐
-    │       Metric            │         Imperial          │
-    ├─────────────────────────┼───────────────────────────┤
-    │ ym (yoctometer[s])      │ in (inch[es])             │
-    │ zm (zeptometer[s])      │ ft (feet)                 │
-    │ am (attometer[s])       │ mi (mile[s])              │
-    │ fm (femtometer[s])      │ AU (astronomical_unit[s]) │
-    │ pm (picometer[s])       │ uni (universe[s])         │
-    │ nm (nanometer[s])       │                           │
-    │ µm (micrometer[s])      │                           │
-    │ mm (millimeter[s])      │                           │
-    │ cm (centimeter[s])      │                           │
-    │ m (meter[s])            │                           │
-    │ km (kilometer[s])       │                           │
-    │ Mm (megameter[s])       │                           │
-    │ Gm (gigameter[s])       │                           │
-    │ Tm (terameter[s])       │                           │
-    │ Pm (petameter[s])       │                           │
-    │ Em (exameter[s])        │                           │
-    │ Zm (zettameter[s])      │                           │
-    │ Ym (yottameter[s])      │                           │
-    │ uni (universe[s])       │                           │
-    │ kuni (kilouniverse[s])  │                           │
-    │ Muni (megauniverse[s])  │                           │
-    │ Guni (gigauniverse[s])  │                           │
-    │ Tuni (terauniverse[s])  │                           │
-    │ Puni (petauniverse[s])  │                           │
-    │ Euni (exauniverse[s])   │                           │
-    │ Zuni (zettauniverse[s]) │                           │
-    │ Yuni (yottauniverse[s]) │                           │
-    └─────────────────────────┴───────────────────────────┘```""".format(ctx.message.author.id))
+        await ctx.send(f"<@{ctx.message.author.id}>, **Accepted Units**\n*Height*\n```\n{heighttable}```")
 
     @commands.command()
     async def weightunits(self, ctx):
         await ctx.message.delete()
-        await ctx.send("""<@{0}>, **Accepted Units**
-    *Weight*
-    ```
-    ┌─────────────────────────┬───────────────────────────┐
-    │       Metric            │         Imperial          │
-    ├─────────────────────────┼───────────────────────────┤
-    │ yg (yoctogram[s])       │ oz (ounce[s])             │
-    │ zg (zeptogram[s])       │ lbs (pound[s])            │
-    │ ag (attogram[s])        │ Earth[s]                  │
-    │ fg (femtogram[s])       │ Sun[s]                    │
-    │ pg (picogram[s])        │                           │
-    │ ng (nanogram[s])        │                           │
-    │ µg (microgram[s])       │                           │
-    │ mg (milligram[s])       │                           │
-    │ g (gram[s])             │                           │
-    │ kg (kilogram[s])        │                           │
-    │ t (ton[s])              │                           │
-    │ kt (kiloton[s])         │                           │
-    │ Mt (megaton[s])         │                           │
-    │ Gt (gigaton[s])         │                           │
-    │ Tt (teraton[s])         │                           │
-    │ Pt (petaton[s])         │                           │
-    │ Et (exaton[s])          │                           │
-    │ Zt (zettaton[s])        │                           │
-    │ Yt (yottaton[s])        │                           │
-    │ uni (universe[s])       │                           │
-    │ kuni (kilouniverse[s])  │                           │
-    │ Muni (megauniverse[s])  │                           │
-    │ Guni (gigauniverse[s])  │                           │
-    │ Tuni (terauniverse[s])  │                           │
-    │ Puni (petauniverse[s])  │                           │
-    │ Euni (exauniverse[s])   │                           │
-    │ Zuni (zettauniverse[s]) │                           │
-    │ Yuni (yottauniverse[s]) │                           │
-    └─────────────────────────┴───────────────────────────┘```""".format(ctx.message.author.id))
+        await ctx.send(f"<@{ctx.message.author.id}>, **Accepted Units**\n*Weight*\n```\n{weighttable}```")
 
     @commands.command()
     async def help(self, ctx, what:str = None):
@@ -99,8 +38,8 @@ class ModCog(commands.Cog):
     *†† Indicates which system to use for your sizetag. U = US, M = metric.*
     ```
     unregister
-    stats <user/size>
-    change [x,/,+,-] [value]
+    stats <user/size> <stat...>
+    change [x,/,+,-] [value] <[x,/,+,-] [value]...>
     setheight [height]
     set0
     setinf
@@ -109,13 +48,18 @@ class ModCog(commands.Cog):
     setrandomheight [minheight] [maxheight]
     slowchange [x,/,+,-] [amount] [delay]
     stopchange
+    slowchanges
     roll XdY
     changenick [nick]
     setspecies [species]
     clearspecies
     setdisplay [Y/N]
     setsystem [M/U]
-    compare [user/size 1] <user/size 2>
+    compare [user/size 1] <user/size 2> <user/size 3...>
+    leaderboard <tallest/smallest> <n>
+    rank <user/size>
+    nearsize <user/size> <n>
+    lookslike <user/size> <n>
     sing [string]```
 
     *Other Topics*
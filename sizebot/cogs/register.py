@@ -1,22 +1,15 @@
-import os
-from decimal import Decimal
-
 import discord
 from discord.ext import commands
 from discord.utils import get
 
 import sizebot.digilogger as logger
-from sizebot.globalsb import folder, readhexcode, regenhexcode
-from sizebot.globalsb import isFeetAndInchesAndIfSoFixIt, getlet, getnum, toSV, toWV
+from sizebot.globalsb import readhexcode, regenhexcode
+from sizebot.globalsb import store, user_exists, User
+from sizebot.sizeparser import parseHeight, parseWeight, SizeParseError
 from sizebot.globalsb import sizebotuser_roleid
 from sizebot.globalsb import nickupdate
 
 
-# Add newlines and join into one string
-def lines(items):
-    return "".join(item + "\n" for item in items)
-
-
 async def addUserRole(member):
     role = get(member.guild.roles, id=sizebotuser_roleid)
     if role is None:
@@ -41,38 +34,31 @@ class RegisterCog(commands.Cog):
     async def register(self, ctx, nick: str, display: str, currentheight: str, baseheight: str, baseweight: str, units: str, species: str = None):
         # Registers a user for SizeBot.
 
-        # Fix feet and inches.
-        currentheight = isFeetAndInchesAndIfSoFixIt(currentheight)
-        baseheight = isFeetAndInchesAndIfSoFixIt(baseheight)
-
-        # Extract values and units.
-        chu = getlet(currentheight)
-        bhu = getlet(baseheight)
-        bwu = getlet(baseweight)
-        currentheight = getnum(currentheight)
-        baseheight = getnum(baseheight)
-        baseweight = getnum(baseweight)
-
-        # Convert floats to decimals.
-        currentheight = Decimal(currentheight)
-        baseheight = Decimal(baseheight)
-        baseweight = Decimal(baseweight)
+        # Parse sizes.
+        try:
+            currentheightSV = parseHeight(currentheight)
+            baseheightSV = parseHeight(baseheight)
+            baseweightWV = parseWeight(baseweight)
+        except SizeParseError as e:
+            logger.warn(f"Invalid size on user registration: {e}")
+            await ctx.send(f"{e}. Sizes look like `5ft 3in`, `175cm` or `60kg`.", delete_after=5)
+            return
 
-        readable = "CH {0}, CHU {1}, BH {2}, BHU {3}, BW {4}, BWU {5}".format(currentheight, chu, baseheight, bhu, baseweight, bwu)
+        readable = "CH {0}, BH {1}, BW {2}".format(currentheightSV, baseheightSV, baseweightWV)
         logger.warn("New user attempt! Nickname: {0}, Display: {1}".format(nick, display))
         print(readable)
 
         # Already registered.
-        if os.path.exists(folder + '/users/' + str(ctx.message.author.id) + '.txt'):
+        if user_exists(ctx.message.author.id):
             await ctx.send("""Sorry! You already registered with SizeBot.
     To unregister, use the `&unregister` command.""", delete_after=10)
             logger.warn("User already registered on user registration: {1}.".format(ctx.message.author))
             return
 
         # Invalid size value.
-        if (currentheight <= 0 or
-                baseheight <= 0 or
-                baseweight <= 0):
+        if (currentheightSV <= 0 or
+                baseheightSV <= 0 or
+                baseweightWV <= 0):
             logger.warn("Invalid size value.")
             await ctx.send("All values must be an integer greater than zero.", delete_after=5)
             return
@@ -89,33 +75,30 @@ class RegisterCog(commands.Cog):
             return
 
         # Success.
-        if species is None:
-            species = "None"
-
-        # Make an array of string items, one per line.
-        output = lines([
-            f"{nick}",
-            f"{display}",
-            f"{toSV(currentheight, chu)}",
-            f"{toSV(baseheight, bhu)}",
-            f"{toWV(baseweight, bwu)}",
-            "1.0",
-            f"{units}",
-            f"{species}"
-        ])
-
-        with open(folder + '/users/' + str(ctx.message.author.id) + '.txt', "w") as userfile:
-            try:
-                userfile.write(output)
-            except UnicodeDecodeError():
-                logger.warn("Unicode in nick or species.")
-                await ctx.send("<@{0}> Unicode error! Please don't put Unicode characters in your nick or species.".format(ctx.message.author.id))
-                return
+        if species == "None":
+            species = None
+
+        userdata = User(
+            nickname=nick,
+            display=display.upper() == "Y",
+            height=currentheightSV,
+            baseheight=baseheightSV,
+            baseweight=baseweightWV,
+            unitsystem=units.upper(),
+            species=species
+        )
+
+        try:
+            await store.put(ctx.message.author.id, userdata)
+        except UnicodeEncodeError:
+            logger.warn("Unicode in nick or species.")
+            await ctx.send("<@{0}> Unicode error! Please don't put Unicode characters in your nick or species.".format(ctx.message.author.id))
+            return
 
         await addUserRole(ctx.message.author)
 
         logger.warn("Made a new user: {0}!".format(ctx.message.author))
-        print(output)
+        print(userdata)
         await ctx.send("Registered <@{0}>. {1}.".format(ctx.message.author.id, readable), delete_after=5)
 
     @register.error
@@ -127,7 +110,7 @@ class RegisterCog(commands.Cog):
 
     @commands.command()
     async def unregister(self, ctx, code=None):
-        if not os.path.exists(folder + '/users/' + str(ctx.message.author.id) + '.txt'):
+        if not user_exists(ctx.message.author.id):
             # User file missing.
             logger.warn("User {0} not registered with SizeBot, but tried to unregister anyway.".format(ctx.message.author.id))
             await ctx.send("""Sorry! You aren't registered with SizeBot.
@@ -135,19 +118,22 @@ class RegisterCog(commands.Cog):
             return
 
         if code is None:
-            regenhexcode()
+            await store.run(regenhexcode)
             await ctx.send("""To unregister, use the `&unregister` command and the following code.
-    `{0}`""".format(readhexcode()), delete_after=30)
+    `{0}`""".format(await store.run(readhexcode)), delete_after=30)
             return
 
-        if code != readhexcode():
+        hexcode = await store.run(readhexcode)
+        if code != hexcode:
             logger.warn("User {0} tried to unregister, but said the wrong hexcode.".format(ctx.message.author.id))
-            await ctx.send("Incorrect code. You said: `{0}`. The correct code was: `{1}`. Try again.".format(code, readhexcode()), delete_after=10)
+            await ctx.send("Incorrect code. You said: `{0}`. The correct code was: `{1}`. Try again.".format(code, hexcode), delete_after=10)
             return
 
         logger.warn("User {0} successfully unregistered.".format(ctx.message.author.id))
         await ctx.send("Correct code! Unregistered {0}".format(ctx.message.author.name), delete_after=5)
-        os.remove(folder + "/users/" + str(ctx.message.author.id) + ".txt")
+        # Not while a change is between reading and writing their record, or it would be written back afterwards.
+        async with store.lock(ctx.message.author.id):
+            await store.delete(ctx.message.author.id)
 
         await removeUserRole(ctx.message.author)
 
@@ -1,27 +1,19 @@
-import os
 from decimal import Decimal, InvalidOperation
 
-import discord
 from discord.ext import commands
+import numpy as np
 
 # TODO: Fix this...
-from sizebot.globalsb import NICK, DISP, CHEI, BHEI, BWEI, DENS, UNIT, SPEC
-from sizebot.globalsb import read_user, folder, getnum, getlet, isFeetAndInchesAndIfSoFixIt
-from sizebot.globalsb import defaultheight, defaultweight, defaultdensity, inch
-from sizebot.globalsb import fromSVacc, fromSVUSA, fromSV, fromWV, fromWVUSA, toShoeSize, toSV
+from sizebot.globalsb import User
+from sizebot.globalsb import store, user_exists
+from sizebot.globalsb import fromSVacc, fromSVUSA, fromSV, fromWV, fromWVUSA
 from sizebot.globalsb import printtab
+from sizebot.measurements import measure, measureUser
+from sizebot.objects import nearestByLength, nearestByMass, timesAs
+from sizebot.precision import precise
+from sizebot.sizeparser import parseHeight, SizeParseError
 import sizebot.digilogger as logger
 
-# TODO: Move to units module.
-# Conversion constants.
-footfactor = Decimal(1) / Decimal(7)
-footwidthfactor = footfactor / Decimal(2.5)
-footthickfactor = Decimal(1) / Decimal(65)
-thumbfactor = Decimal(1) / Decimal(69.06)
-fingerprintfactor = Decimal(1) / Decimal(35080)
-hairwidthfactor = Decimal(1) / Decimal(23387)
-pointerfactor = Decimal(1) / Decimal(17.26)
-
 
 def fancyFormat(v):
     if v > Decimal("1E15"):
@@ -30,6 +22,35 @@ def fancyFormat(v):
         return f"{v:,.4}"
 
 
+class StatLine:
+    """One line of &stats: the names it can be asked for by, and how to render it from a Measurements.
+
+    Rendering only touches the measurements that line shows, so asking for one line only works those out."""
+
+    def __init__(self, names, render):
+        self.names = names
+        self.render = render
+
+
+statlines = [
+    StatLine(["height"], lambda m: f"Current Height: {m.format('height', fromSVacc)} / {m.format('height', fromSVUSA)} ({fancyFormat(m.multiplier)}x character base, {fancyFormat(m.defmultiplier)}x average)"),
+    StatLine(["weight"], lambda m: f"Current Weight: {m.format('weight', fromWV)} / {m.format('weight', fromWVUSA)} ({fancyFormat(m.multipliercubed)}x charbase, {fancyFormat(m.defmultipliercubed)}x average)"),
+    StatLine(["density"], lambda m: f"Current Density: {m.density}x"),
+    StatLine(["foot", "footlength", "shoe", "shoesize"], lambda m: f"Foot Length: {m.format('footlength', fromSVacc)} / {m.format('footlength', fromSVUSA)} ({m.shoesize})"),
+    StatLine(["footwidth"], lambda m: f"Foot Width: {m.format('footwidth', fromSV)} / {m.format('footwidth', fromSVUSA)}"),
+    StatLine(["toe", "toeheight"], lambda m: f"Toe Height: {m.format('toeheight', fromSVacc)} / {m.format('toeheight', fromSVUSA)}"),
+    StatLine(["pointer", "finger"], lambda m: f"Pointer Finger Length: {m.format('pointer', fromSVacc)} / {m.format('pointer', fromSVUSA)}"),
+    StatLine(["thumb", "thumbwidth"], lambda m: f"Thumb Width: {m.format('thumbwidth', fromSVacc)} / {m.format('thumbwidth', fromSVUSA)}"),
+    StatLine(["fingerprint", "fingerprintdepth"], lambda m: f"Fingerprint Depth: {m.format('fingerprintdepth', fromSVacc)} / {m.format('fingerprintdepth', fromSVUSA)}"),
+    StatLine(["hair", "hairwidth"], lambda m: f"Hair Width: {m.format('hairwidth', fromSVacc)} / {m.format('hairwidth', fromSVUSA)}"),
+    StatLine(["normalheight", "man"], lambda m: f"Size of a Normal Man (Comparative) {m.format('relativedefaultheight', fromSVacc)} / {m.format('relativedefaultheight', fromSVUSA)}"),
+    StatLine(["normalweight"], lambda m: f"Weight of a Normal Man (Comparative) {m.format('relativedefaultweight', fromWV)} / {m.format('relativedefaultweight', fromWVUSA)}"),
+    StatLine(["base", "bases"], lambda m: f"Character Bases: {m.format('baseheight', fromSVUSA)} / {m.format('baseheight', fromSV)} | {m.format('baseweight', fromWV)} / {m.format('baseweight', fromWVUSA)}")
+]
+
+statsbyname = {name: line for line in statlines for name in line.names}
+
+
 # TODO: Move to dedicated module.
 async def get_user(ctx, user_string, fakename=None):
     try:
@@ -42,7 +63,7 @@ async def get_user(ctx, user_string, fakename=None):
 
     if member:
         usertag = f"<@{member.id}>"
-        user = load_user(member.id)
+        user = await load_user(member.id)
         if user is None:
             await ctx.send(
                 "Sorry! User isn't registered with SizeBot.\n"
@@ -51,9 +72,9 @@ async def get_user(ctx, user_string, fakename=None):
             return None, None
     else:
         usertag = fakename
-        heightstring = isFeetAndInchesAndIfSoFixIt(user_string)
-        height = toSV(getnum(heightstring), getlet(heightstring))
-        if height is None:
+        try:
+            height = parseHeight(user_string)
+        except SizeParseError:
             await ctx.send(
                 "Sorry! I didn't recognize that user or height.",
                 delete_after=5)
@@ -64,32 +85,64 @@ async def get_user(ctx, user_string, fakename=None):
     return usertag, user
 
 
-def load_user(userid):
+async def get_subject(ctx, user_string):
+    """Like get_user, but quiet, and labelled with a plain name so it reads well inside a code block."""
+    try:
+        member = await commands.MemberConverter().convert(ctx, user_string)
+    except commands.errors.BadArgument:
+        member = None
+
+    if member:
+        return member.display_name, await load_user(member.id)
+
+    try:
+        height = parseHeight(user_string)
+    except SizeParseError:
+        return None, None
+    return user_string, height_to_user(height, user_string)
+
+
+async def load_user(userid):
     userid = str(userid)
-    if not os.path.exists(folder + "/users/" + userid + ".txt"):
+    if not user_exists(userid):
         # User file missing
         return None
-    user = read_user(userid)
+    user = await store.get(userid)
     return user
 
 
 def height_to_user(height, fakename=None):
     if fakename is None:
-        fakename = "Raw\n"
-    else:
-        fakename = fakename + "\n"
-
-    user = [
-        fakename,
-        "Y\n",
-        height,
-        defaultheight,
-        defaultweight,
-        defaultdensity,
-        "M\n",
-        "None\n"
-    ]
-    return user
+        fakename = "Raw"
+
+    return User(fakename, height=height)
+
+
+# Most people or sizes &compare will put in one table.
+maxcompare = 8
+# Longest name shown in a table.
+maxlabel = 12
+
+
+def fromLog(logvalue, formatter):
+    if np.isnan(logvalue):
+        return "?"
+    if logvalue == np.inf:
+        return "∞"
+    if logvalue == -np.inf:
+        return "0"
+    return formatter(Decimal(10) ** Decimal(repr(float(logvalue))))
+
+
+def matrixTable(title, labels, logvalues, formatter):
+    labels = [label[:maxlabel] for label in labels]
+    rows = [[title] + labels]
+    for label, logrow in zip(labels, logvalues):
+        rows.append([label] + [fromLog(v, formatter) for v in logrow])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = [" | ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return "\n".join(lines)
 
 
 class StatsCog(commands.Cog):
@@ -97,27 +150,62 @@ class StatsCog(commands.Cog):
         self.bot = bot
 
     @commands.command()
-    async def stats(self, ctx, who: str = None):
+    async def stats(self, ctx, who: str = None, *fields):
         if who is None:
             who = str(ctx.message.author.id)
 
+        lines = statlines
+        if fields:
+            unknown = [f for f in fields if f.lower() not in statsbyname]
+            if unknown:
+                await ctx.send(f"Unknown stat {', '.join(unknown)}. Try one of: {', '.join(statsbyname)}.", delete_after=10)
+                return
+            lines = list(dict.fromkeys(statsbyname[f.lower()] for f in fields))
+
         user1tag, user1 = await get_user(ctx, who)
         if user1 is None:
             return
 
-        output = self.user_stats(user1tag, user1)
+        output = self.user_stats(user1tag, user1, lines)
         await ctx.send(output)
         logger.msg(f"Stats for {who} sent.")
 
     @commands.command()
-    async def compare(self, ctx, who1=None, who2=None, who1name=None, who2name=None):
-        if who2 is None:
-            who2 = str(ctx.message.author.id)
-
-        if who1 is None:
+    async def compare(self, ctx, *whos):
+        if not whos:
             await ctx.send("Please use either two parameters to compare two people or sizes, or one to compare with yourself.", delete_after=5)
             return
 
+        if len(whos) <= 2:
+            await self.compare_two(ctx, *whos)
+            return
+
+        if len(whos) > maxcompare:
+            await ctx.send(f"I can only compare up to {maxcompare} people or sizes at once.", delete_after=5)
+            return
+
+        subjects = [await get_subject(ctx, who) for who in whos]
+        # &compare [who1] <who2> <who1name> <who2name> is still a two-way compare, unless the extra arguments are people or sizes too.
+        if len(whos) <= 4 and any(user is None for label, user in subjects[2:]):
+            await self.compare_two(ctx, *whos)
+            return
+
+        for who, (label, user) in zip(whos, subjects):
+            if user is None:
+                await ctx.send(f"{who} is not a recognized user or size.")
+                return
+        labels = [label for label, user in subjects]
+        users = [user for label, user in subjects]
+
+        heighttable, weighttable = self.compare_matrix(labels, users)
+        await ctx.send(f"**How big each row looks to each column:**\n```\n{heighttable}```")
+        await ctx.send(f"```\n{weighttable}```")
+        logger.msg(f"Compared {len(users)} users: {', '.join(labels)}")
+
+    async def compare_two(self, ctx, who1, who2=None, who1name=None, who2name=None):
+        if who2 is None:
+            who2 = str(ctx.message.author.id)
+
         if who1name is None:
             who1name = "Raw 1"
 
@@ -133,16 +221,53 @@ class StatsCog(commands.Cog):
             await ctx.send(f"{who2} is not a recognized user or size.")
             return
 
-        output = self.compare_users(user1tag, user1, user2tag, user2)
+        with precise(user1.height, user1.baseheight, user2.height, user2.baseheight):
+            output = self.compare_users(user1tag, user1, user2tag, user2)
         await ctx.send(output)
         logger.msg(f"Compared {user1} and {user2}")
 
+    def compare_matrix(self, labels, users):
+        """Tables of how tall and heavy each user looks to each other user.
+
+        Everything is worked out at once on log10 values, and only the cells shown get turned back into Decimals."""
+        heights = np.array([float(u.height) for u in users])
+        baseheights = np.array([float(u.baseheight) for u in users])
+        baseweights = np.array([float(u.baseweight) for u in users])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            logheights = np.log10(heights)
+            logmults = logheights - np.log10(baseheights)
+            # Row x looks to column y like x's size, divided by y's multiplier.
+            looksheight = logheights[:, None] - logmults[None, :]
+            looksweight = np.log10(baseweights)[:, None] + 3 * (logmults[:, None] - logmults[None, :])
+        return (matrixTable("Height", labels, looksheight, fromSV),
+                matrixTable("Weight", labels, looksweight, fromWV))
+
+    @commands.command()
+    async def lookslike(self, ctx, who: str = None, k: int = 3):
+        if who is None:
+            who = str(ctx.message.author.id)
+        k = max(1, min(k, 10))
+
+        usertag, user = await get_user(ctx, who)
+        if user is None:
+            return
+
+        m = measureUser(user)
+        lines = [f"**{usertag} ({m.format('height', fromSV)} / {m.format('height', fromSVUSA)}) is about the size of:**"]
+        for o in nearestByLength(m.height, k):
+            lines.append(f"{printtab}{o.name} ({fromSV(o.length)} / {fromSVUSA(o.length)}): {timesAs(m.height, o.length)}")
+        lines.append(f"**and weighs ({m.format('weight', fromWV)} / {m.format('weight', fromWVUSA)}) about as much as:**")
+        for o in nearestByMass(m.weight, k):
+            lines.append(f"{printtab}{o.name} ({fromWV(o.mass)} / {fromWVUSA(o.mass)}): {timesAs(m.weight, o.mass)}")
+        await ctx.send("\n".join(lines))
+        logger.msg(f"Looks like for {who} sent.")
+
     def compare_users(self, user1tag, user1, user2tag, user2):
-        if Decimal(user1[CHEI]) == Decimal(user2[CHEI]):
+        if user1.height == user2.height:
             return f"{user1tag} and {user2tag} match 1 to 1."
 
         # Who's taller?
-        if Decimal(user1[CHEI]) > Decimal(user2[CHEI]):
+        if user1.height > user2.height:
             biguser = user1
             bigusertag = user1tag
             smalluser = user2
@@ -154,185 +279,55 @@ class StatsCog(commands.Cog):
             smallusertag = user1tag
 
         # Compare math.
-        bch = Decimal(biguser[CHEI])
-        bbh = Decimal(biguser[BHEI])
-        sch = Decimal(smalluser[CHEI])
-        sbh = Decimal(smalluser[BHEI])
-        bbw = Decimal(biguser[BWEI])
-        sbw = Decimal(smalluser[BWEI])
-        bd = Decimal(biguser[DENS])
-        sd = Decimal(smalluser[DENS])
-        bigmult = (bch / bbh)
-        smallmult = (sch / sbh)
-        bigmultcubed = (bigmult ** 3)
-        smallmultcubed = (smallmult ** 3)
-        dispbigmult = round(bigmult, 4)
-        dispsmallmult = round(smallmult, 4)
-        dispbigmultcubed = round(bigmultcubed, 4)
-        dispsmallmultcubed = round(smallmultcubed, 4)
-        bcw = bbw * (bigmult ** 3) * bd
-        scw = sbw * (smallmult ** 3) * sd
-        diffmult = bigmult / smallmult
-        b2sh = bbh * diffmult
-        s2bh = sbh / diffmult
-        b2sw = bbw * (diffmult ** 3)
-        s2bw = sbw / (diffmult ** 3)
-        bigtosmallheight = fromSVacc(b2sh)
-        smalltobigheight = fromSVacc(s2bh)
-        bigtosmallheightUSA = fromSVUSA(b2sh)
-        smalltobigheightUSA = fromSVUSA(s2bh)
-        bigtosmallfoot = fromSVacc(b2sh * footfactor)
-        smalltobigfoot = fromSVacc(s2bh * footfactor)
-        bigtosmallfootUSA = fromSVUSA(b2sh * footfactor)
-        smalltobigfootUSA = fromSVUSA(s2bh * footfactor)
-        bigtosmallshoe = toShoeSize(b2sh * footfactor)
-        smalltobigshoe = toShoeSize(s2bh * footfactor)
-        bigtosmallweight = fromWV(b2sw)
-        smalltobigweight = fromWV(s2bw)
-        bigtosmallweightUSA = fromWVUSA(b2sw)
-        smalltobigweightUSA = fromWVUSA(s2bw)
-        bigtosmallfootwidth = fromSVacc(b2sh * footwidthfactor)
-        smalltobigfootwidth = fromSVacc(s2bh * footwidthfactor)
-        bigtosmallfootwidthUSA = fromSVUSA(b2sh * footwidthfactor)
-        smalltobigfootwidthUSA = fromSVUSA(s2bh * footwidthfactor)
-        bigtosmallfootthick = fromSVacc(b2sh * footthickfactor)
-        smalltobigfootthick = fromSVacc(s2bh * footthickfactor)
-        bigtosmallfootthickUSA = fromSVUSA(b2sh * footthickfactor)
-        smalltobigfootthickUSA = fromSVUSA(s2bh * footthickfactor)
-        bigtosmallthumb = fromSVacc(b2sh * thumbfactor)
-        smalltobigthumb = fromSVacc(s2bh * thumbfactor)
-        bigtosmallthumbUSA = fromSVUSA(b2sh * thumbfactor)
-        smalltobigthumbUSA = fromSVUSA(s2bh * thumbfactor)
-        bigtosmallfingerprint = fromSVacc(b2sh * fingerprintfactor)
-        smalltobigfingerprint = fromSVacc(s2bh * fingerprintfactor)
-        bigtosmallfingerprintUSA = fromSVUSA(b2sh * fingerprintfactor)
-        smalltobigfingerprintUSA = fromSVUSA(s2bh * fingerprintfactor)
-        bigtosmallhairwidth = fromSVacc(b2sh * hairwidthfactor)
-        smalltobighairwidth = fromSVacc(s2bh * hairwidthfactor)
-        bigtosmallhairwidthUSA = fromSVUSA(b2sh * hairwidthfactor)
-        smalltobighairwidthUSA = fromSVUSA(s2bh * hairwidthfactor)
-        bigtosmallpointer = fromSVacc(b2sh * pointerfactor)
-        smalltobigpointer = fromSVacc(s2bh * pointerfactor)
-        bigtosmallpointerUSA = fromSVUSA(b2sh * pointerfactor)
-        smalltobigpointerUSA = fromSVUSA(s2bh * pointerfactor)
-        timestaller = fancyFormat(round(bch / sch, 3))
+        big = measureUser(biguser)
+        small = measureUser(smalluser)
+        diffmult = big.multiplier / small.multiplier
+        # How each of them looks to the other: their base size, scaled by the difference between them.
+        bigtosmall = measure(big.baseheight * diffmult, big.baseheight, big.baseweight, Decimal(1))
+        smalltobig = measure(small.baseheight / diffmult, small.baseheight, small.baseweight, Decimal(1))
+        dispbigmult = round(big.multiplier, 4)
+        dispsmallmult = round(small.multiplier, 4)
+        dispbigmultcubed = round(big.multipliercubed, 4)
+        dispsmallmultcubed = round(small.multipliercubed, 4)
+        timestaller = fancyFormat(round(big.height / small.height, 3))
 
         # Print compare.
         return (
             "**Comparison:**\n"
             f"{bigusertag} is really:\n"
-            f"{printtab}Real Height: {fromSVacc(bch)} / {fromSVUSA(bch)} ({fancyFormat(dispbigmult)}x basesize)\n"
-            f"{printtab}Real Weight: {fromWV(bcw)} / {fromWVUSA(bcw)}. ({fancyFormat(dispbigmultcubed)}x basesize)\n"
+            f"{printtab}Real Height: {big.format('height', fromSVacc)} / {big.format('height', fromSVUSA)} ({fancyFormat(dispbigmult)}x basesize)\n"
+            f"{printtab}Real Weight: {big.format('weight', fromWV)} / {big.format('weight', fromWVUSA)}. ({fancyFormat(dispbigmultcubed)}x basesize)\n"
             f"To {smallusertag}, {bigusertag} looks:\n"
-            f"{printtab}Height: {bigtosmallheight} / {bigtosmallheightUSA}\n"
-            f"{printtab}Weight: {bigtosmallweight} / {bigtosmallweightUSA}\n"
-            f"{printtab}Foot Length: {bigtosmallfoot} / {bigtosmallfootUSA} ({bigtosmallshoe})\n"
-            f"{printtab}Foot Width: {bigtosmallfootwidth} / {bigtosmallfootwidthUSA}\n"
-            f"{printtab}Toe Height: {bigtosmallfootthick} / {bigtosmallfootthickUSA}\n"
-            f"{printtab}Pointer Finger Length: {bigtosmallpointer} / {bigtosmallpointerUSA}\n"
-            f"{printtab}Thumb Width: {bigtosmallthumb} / {bigtosmallthumbUSA}\n"
-            f"{printtab}Fingerprint Depth: {bigtosmallfingerprint} / {bigtosmallfingerprintUSA}\n"
-            f"{printtab}Hair Width: {bigtosmallhairwidth} / {bigtosmallhairwidthUSA}\n"
-            "\n"
+            + self.view_lines(bigtosmall)
+            + "\n"
             f"{bigusertag} is {timestaller}x taller than {smallusertag}.\n"
             "\n"
             f"{smallusertag} is really:\n"
-            f"{printtab}Real Height: {fromSVacc(sch)} / {fromSVUSA(sch)} ({fancyFormat(dispsmallmult)}x basesize)\n"
-            f"{printtab}Real Weight: {fromWV(scw)} / {fromWVUSA(scw)}. ({fancyFormat(dispsmallmultcubed)}x basesize)\n"
+            f"{printtab}Real Height: {small.format('height', fromSVacc)} / {small.format('height', fromSVUSA)} ({fancyFormat(dispsmallmult)}x basesize)\n"
+            f"{printtab}Real Weight: {small.format('weight', fromWV)} / {small.format('weight', fromWVUSA)}. ({fancyFormat(dispsmallmultcubed)}x basesize)\n"
             f"To {bigusertag}, {smallusertag} looks:\n"
-            f"{printtab}Height: {smalltobigheight} / {smalltobigheightUSA}\n"
-            f"{printtab}Weight: {smalltobigweight} / {smalltobigweightUSA}\n"
-            f"{printtab}Foot Length: {smalltobigfoot} / {smalltobigfootUSA} ({smalltobigshoe})\n"
-            f"{printtab}Foot Width: {smalltobigfootwidth} / {smalltobigfootwidthUSA}\n"
-            f"{printtab}Toe Height: {smalltobigfootthick} / {smalltobigfootthickUSA}\n"
-            f"{printtab}Pointer Finger Length: {smalltobigpointer} / {smalltobigpointerUSA}\n"
-            f"{printtab}Thumb Width: {smalltobigthumb} / {smalltobigthumbUSA}\n"
-            f"{printtab}Fingerprint Depth: {smalltobigfingerprint} / {smalltobigfingerprintUSA}\n"
-            f"{printtab}Hair Width: {smalltobighairwidth} / {smalltobighairwidthUSA}\n"
-            "\n"
+            + self.view_lines(smalltobig)
+            + "\n"
             f"**Base Sizes:**\n"
-            f"{printtab}{bigusertag}: {fromSVacc(bbh)} / {fromSVUSA(bbh)} | {fromWV(bbw)} / {fromWVUSA(bbw)}\n"
-            f"{printtab}{smallusertag}: {fromSVacc(sbh)} / {fromSVUSA(sbh)} | {fromWV(sbw)} / {fromWVUSA(sbw)}")
-
-    def user_stats(self, usertag, user1):
-        currentheight = Decimal(user1[CHEI])
-        currentheight_m = fromSVacc(currentheight)
-        currentheight_u = fromSVUSA(currentheight)
-
-        baseheight = Decimal(user1[BHEI])
-        baseheight_m = fromSVUSA(baseheight)
-        baseheight_u = fromSV(baseheight)
-
-        baseweight = Decimal(user1[BWEI])
-        baseweight_m = fromWV(baseweight)
-        baseweight_u = fromWVUSA(baseweight)
-
-        density = Decimal(user1[DENS])
-
-        multiplier = currentheight / baseheight
-        defmultiplier = currentheight / defaultheight
-
-        footheight = currentheight * footfactor
-        footheight_m = fromSVacc(footheight)
-        footheight_u = fromSVUSA(footheight)
-
-        toeheight = currentheight * footthickfactor
-        toeheight_m = fromSVacc(toeheight)
-        toeheight_u = fromSVUSA(toeheight)
-
-        calculatedweight = (baseweight * multiplier ** 3) * density
-        calculatedweight_m = fromWV(calculatedweight)
-        calculatedweight_u = fromWVUSA(calculatedweight)
-
-        relativedefaultheight = defaultheight / defmultiplier
-        relativedefaultheight_m = fromSVacc(relativedefaultheight)
-        relativedefaultheight_u = fromSVUSA(relativedefaultheight)
-
-        relativedefaultweight = defaultweight / defmultiplier ** 3
-        relativedefaultweight_m = fromWV(relativedefaultweight)
-        relativedefaultweight_u = fromWVUSA(relativedefaultweight)
-
-        thumbwidth = currentheight * thumbfactor
-        thumbwidth_m = fromSVacc(thumbwidth)
-        thumbwidth_u = fromSVUSA(thumbwidth)
-
-        footlength = currentheight * footfactor
-        footlength_m = fromSV(footlength)
-        footlength_u = fromSVUSA(footlength)
-
-        footwidth = currentheight * footwidthfactor
-        footwidth_m = fromSV(footwidth)
-        footwidth_u = fromSVUSA(footwidth)
-
-        shoesize = toShoeSize(footlength)
-
-        fingerprintdepth = currentheight * fingerprintfactor
-        fingerprintdepth_m = fromSVacc(fingerprintdepth)
-        fingerprintdepth_u = fromSVUSA(fingerprintdepth)
-
-        hairwidth = currentheight * hairwidthfactor
-        hairwidth_m = fromSVacc(hairwidth)
-        hairwidth_u = fromSVUSA(hairwidth)
-
-        pointer = currentheight * pointerfactor
-        pointer_m = fromSVacc(pointer)
-        pointer_u = fromSVUSA(pointer)
+            f"{printtab}{bigusertag}: {big.format('baseheight', fromSVacc)} / {big.format('baseheight', fromSVUSA)} | {big.format('baseweight', fromWV)} / {big.format('baseweight', fromWVUSA)}\n"
+            f"{printtab}{smallusertag}: {small.format('baseheight', fromSVacc)} / {small.format('baseheight', fromSVUSA)} | {small.format('baseweight', fromWV)} / {small.format('baseweight', fromWVUSA)}")
 
+    def view_lines(self, view):
         return (
-            f"**{usertag} Stats:**\n"
-            f"Current Height: {currentheight_m} / {currentheight_u} ({fancyFormat(multiplier)}x character base, {fancyFormat(defmultiplier)}x average)\n"
-            f"Current Weight: {calculatedweight_m} / {calculatedweight_u} ({fancyFormat(multiplier ** 3)}x charbase, {fancyFormat(defmultiplier ** 3)}x average)\n"
-            f"Current Density: {density}x\n"
-            f"Foot Length: {footheight_m} / {footheight_u} ({shoesize})\n"
-            f"Foot Width: {footwidth_m} / {footwidth_u}\n"
-            f"Toe Height: {toeheight_m} / {toeheight_u}\n"
-            f"Pointer Finger Length: {pointer_m} / {pointer_u}\n"
-            f"Thumb Width: {thumbwidth_m} / {thumbwidth_u}\n"
-            f"Fingerprint Depth: {fingerprintdepth_m} / {fingerprintdepth_u}\n"
-            f"Hair Width: {hairwidth_m} / {hairwidth_u}\n"
-            f"Size of a Normal Man (Comparative) {relativedefaultheight_m} / {relativedefaultheight_u}\n"
-            f"Weight of a Normal Man (Comparative) {relativedefaultweight_m} / {relativedefaultweight_u}\n"
-            f"Character Bases: {baseheight_m} / {baseheight_u} | {baseweight_m} / {baseweight_u}")
+            f"{printtab}Height: {view.format('height', fromSVacc)} / {view.format('height', fromSVUSA)}\n"
+            f"{printtab}Looks Like: {view.lookslike}\n"
+            f"{printtab}Weight: {view.format('weight', fromWV)} / {view.format('weight', fromWVUSA)}\n"
+            f"{printtab}Foot Length: {view.format('footlength', fromSVacc)} / {view.format('footlength', fromSVUSA)} ({view.shoesize})\n"
+            f"{printtab}Foot Width: {view.format('footwidth', fromSVacc)} / {view.format('footwidth', fromSVUSA)}\n"
+            f"{printtab}Toe Height: {view.format('toeheight', fromSVacc)} / {view.format('toeheight', fromSVUSA)}\n"
+            f"{printtab}Pointer Finger Length: {view.format('pointer', fromSVacc)} / {view.format('pointer', fromSVUSA)}\n"
+            f"{printtab}Thumb Width: {view.format('thumbwidth', fromSVacc)} / {view.format('thumbwidth', fromSVUSA)}\n"
+            f"{printtab}Fingerprint Depth: {view.format('fingerprintdepth', fromSVacc)} / {view.format('fingerprintdepth', fromSVUSA)}\n"
+            f"{printtab}Hair Width: {view.format('hairwidth', fromSVacc)} / {view.format('hairwidth', fromSVUSA)}\n")
+
+    def user_stats(self, usertag, user1, lines=statlines):
+        m = measureUser(user1)
+        return f"**{usertag} Stats:**\n" + "\n".join(line.render(m) for line in lines)
 
     @stats.error
     @logger.err2console
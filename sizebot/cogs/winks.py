@@ -1,17 +1,21 @@
 import re
+import threading
 from datetime import timedelta, datetime
 
 from discord.ext import commands
 
-from sizebot.globalsb import yukioid, pretty_time_delta, digiid
+from sizebot.globalsb import yukioid, pretty_time_delta, digiid, store
+from sizebot.storage import blockingio
 import sizebot.digilogger as logger
 
 winkpath = "../winkcount.txt"
 winkPattern = re.compile(r"(; *\)|:wink:|😉)")  # Only compile regex once, to improve performance
 starttime = datetime(2019, 9, 15)
 milestones = [1111, 2500, 5000, 10000, 25000, 50000, 100000]
+winklock = threading.Lock()  # addWinks runs on the store's worker threads
 
 
+@blockingio
 def getWinks():
     try:
         with open(winkpath, "r") as f:
@@ -24,11 +28,13 @@ def getWinks():
     return winkcount
 
 
+@blockingio
 def addWinks(count=1):
-    winkcount = getWinks()
-    winkcount += count
-    with open(winkpath, "w") as winkfile:
-        winkfile.write(str(winkcount))
+    with winklock:
+        winkcount = getWinks()
+        winkcount += count
+        with open(winkpath, "w") as winkfile:
+            winkfile.write(str(winkcount))
     return winkcount
 
 
@@ -67,7 +73,7 @@ class WinksCog(commands.Cog):
         if winksSeen == 0:
             return
 
-        winkcount = addWinks(winksSeen)
+        winkcount = await store.run(addWinks, winksSeen)
         logger.msg(f"Yukio has winked {winkcount} times!")
         if winkcount in milestones:
             await sayMilestone(message, winkcount)
@@ -75,7 +81,7 @@ class WinksCog(commands.Cog):
 
     @commands.command()
     async def winkcount(self, ctx):
-        winkcount = getWinks()
+        winkcount = await store.run(getWinks)
         await ctx.send(f"Yukio has winked {winkcount} times since 15 September, 2019! :wink:")
         logger.msg(f"Wink count requested! Current count: {winkcount} times!")
 
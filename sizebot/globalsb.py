@@ -13,6 +13,7 @@ import string
 import traceback
 import asyncio
 import codecs
+import itertools
 from pathlib import Path
 
 import discord
@@ -20,6 +21,15 @@ from discord.ext import commands
 from colored import fore, back, style, fg, bg, attr
 
 import sizebot.digilogger as logger
+from sizebot.precision import FAST, HIGH, precise
+from sizebot.units import lengths, weights, lengthscales, lengthscalesUSA, weightscales, weightscalesUSA, trimzeroes, inch, foot, mile, ly, au, uni, infinity, ounce, pound, uston, earth, sun, milkyway, uniw
+from sizebot.user import User, defaultheight, defaultweight, defaultdensity
+from sizebot.usercache import UserCache
+from sizebot.nickcache import NickCache
+from sizebot.nickqueue import NickQueue
+from sizebot.sizeindex import SizeIndex, logSize
+from sizebot.slowchange import SlowChangeState
+from sizebot.storage import openStore, openJobStore, AsyncUserStore, WriteBehind, blockingio, iostats
 
 
 # TODO: Make this do something useful.
@@ -30,11 +40,6 @@ class DigiException(Exception):
 # Version.
 version = "3.3.8"
 
-# Defaults
-defaultheight = Decimal("1754000")  # micrometers
-defaultweight = Decimal("66760000")  # milligrams
-defaultdensity = Decimal("1.0")
-
 # Constants
 newline = "\n"
 folder = ".."
@@ -47,17 +52,86 @@ sizebotuser_roleid = 562356758522101769
 brackets = ["[", "]", "<", ">"]
 allowbrackets = ("&compare", "&stats")
 
-# Array item names.
-NICK = 0
-DISP = 1
-CHEI = 2
-BHEI = 3
-BWEI = 4
-DENS = 5
-UNIT = 6
-SPEC = 7
+# Where user records live: ../users.db once migrated (see sizebot.migrate), ../users/*.txt until then.
+userstore = openStore(folder)
+
+# Slow changes and repeats, kept in ../jobs.json so they carry on after a restart.
+jobstore = openJobStore(folder)
+
+# IDs of every registered user, as strings. Built once here, then kept up to date by write_user and delete_user.
+registered = set(userstore.ids())
+
+# Recently used user records, kept in front of read_user/write_user.
+usercache = UserCache(maxsize=512)
+
+# Bumped by write_user and delete_user, so nickupdate can tell a record has changed without reading it.
+recordversions = {}
+versioncounter = itertools.count(1)
+
+# Each slow-changing user's SlowChangeState. Their height is worked out from it by read_user, rather than written every step.
+slowchangestates = {}
+
+# The nickname last given to each member, and the record version it came from.
+nickcache = NickCache()
+
+
+def recordVersion(user_id):
+    user_id = str(user_id)
+    # A slow change's steps change their height without a write.
+    state = slowchangestates.get(user_id)
+    steps = 0 if state is None else state.steps(time.time())
+    return recordversions.get(user_id, 0), steps
+
+
+def bumpVersion(user_id):
+    recordversions[str(user_id)] = next(versioncounter)
+
+
+# Every user's current height and multiplier, sorted, for &leaderboard and &rank. Kept up to date by write_user and delete_user.
+heightindex = SizeIndex()
+multiplierindex = SizeIndex()
+# log10 of each user's current height, as floats, for &nearsize.
+logheightindex = SizeIndex()
+
 
+def rankMultiplier(user):
+    # Worked out at a fixed precision, since indexUser runs on worker threads with their own contexts.
+    with localcontext(FAST):
+        return user.multiplier
 
+
+def indexUser(user_id, user):
+    heightindex.update(user_id, user.height)
+    logheightindex.update(user_id, logSize(user.height))
+    if user.baseheight:
+        multiplierindex.update(user_id, rankMultiplier(user))
+    else:
+        multiplierindex.remove(user_id)
+
+
+def unindexUser(user_id):
+    heightindex.remove(user_id)
+    logheightindex.remove(user_id)
+    multiplierindex.remove(user_id)
+
+
+def buildIndexes():
+    """Fill the size indexes from every stored user. Only done at startup."""
+    for userid, fields in userstore.records():
+        if not fields:
+            continue
+        try:
+            user = User.fromFields(fields)
+        except (IndexError, InvalidOperation):
+            logger.warn(f"Skipping unreadable user {userid} while building indexes.")
+            continue
+        indexUser(userid, user)
+
+
+buildIndexes()
+
+
+@blockingio
 def regenhexcode():
     # 16-char hex string gen for unregister.
     hexdigits = "1234567890abcdef"
@@ -67,6 +141,7 @@ def regenhexcode():
         hexfile.write(hexstring)
 
 
+@blockingio
 def readhexcode():
     # Read the hexcode from the file.
     with open("../hexstring.txt", "r") as hexfile:
@@ -84,10 +159,8 @@ ascii = r"""
 .\____/|_/___\___\____/ \___/ \__\____/ ."""
 
 # Configure decimal module.
-getcontext()
-context = Context(prec=250, rounding=ROUND_HALF_EVEN, Emin=-9999999, Emax=999999,
-                  capitals=1, clamp=0, flags=[], traps=[Overflow, DivisionByZero,
-                                                        InvalidOperation])
+# Most math runs at the FAST tier; code that needs more switches to a local context (see sizebot.precision).
+context = FAST
 setcontext(context)
 
 
@@ -99,19 +172,6 @@ def getnum(string):
     return Decimal(match.group(0))
 
 
-# Get letters from string.
-def getlet(string):
-    match = re.search(r"[a-zA-Z\'\"]+", string)
-    if match is None:
-        return None
-    return match.group(0)
-
-
-# Remove trailing zeroes from a Decimal
-def trimzeroes(d):
-    return d.normalize() + 0
-
-
 def removebrackets(string):
     for bracket in brackets:
         string = string.replace(bracket, "")
@@ -140,44 +200,23 @@ def pretty_time_delta(seconds):
         return '%d seconds' % (seconds)
 
 
-# Update users nicknames to include sizetags.
-async def nickupdate(user):
-    if user.discriminator == "0000":
-        return
-    if not isinstance(user, discord.Member):
-        if user.id == mee6id:
-            return
-        logger.warn(f"Attempted to update user {user.id} ({user.name}), but they DM'd SizeBot.")
-    # Don't update owner's nick, permissions error.
-    if user.id == user.guild.owner_id:
-        # logger.warn(f"Attempted to update user {user.id} ({user.name}), but they own this server.")
-        return
-    # Don't update users who aren't registered.
-    if not os.path.exists(f"{folder}/users/{user.id}.txt"):
-        return
-
-    userarray = read_user(user.id)
-
+# The nickname a user's record says they should have, or None if they don't want a sizetag.
+def formatNick(userdata):
     # User's display setting is N. No sizetag.
-    if userarray[DISP].strip() != "Y":
-        return
+    if not userdata.display:
+        return None
+
+    nick = userdata.nickname.strip()
 
-    height = userarray[CHEI]
-    if height is None:
-        height = userarray[BHEI]
-    nick = userarray[NICK].strip()
-    species = userarray[SPEC].strip()
-
-    unit_system = userarray[UNIT].strip().upper()
-    if unit_system == "M":
-        sizetag = fromSV(height)
-    elif unit_system == "U":
-        sizetag = fromSVUSA(height)
+    if userdata.unitsystem == "M":
+        sizetag = fromSV(userdata.height)
+    elif userdata.unitsystem == "U":
+        sizetag = fromSVUSA(userdata.height)
     else:
         sizetag = ""
 
-    if species != "None":
-        sizetag = f"{sizetag}, {species}"
+    if userdata.species is not None:
+        sizetag = f"{sizetag}, {userdata.species.strip()}"
 
     max_nick_len = 32
 
@@ -196,92 +235,223 @@ async def nickupdate(user):
     else:
         # Cannot fit the new sizetag.
         newnick = nick
+    return newnick
+
+
+# Whether this is someone SizeBot can and should give a sizetag.
+def canNick(user):
+    if user.discriminator == "0000":
+        return False
+    if not isinstance(user, discord.Member):
+        if user.id == mee6id:
+            return False
+        logger.warn(f"Attempted to update user {user.id} ({user.name}), but they DM'd SizeBot.")
+        return False
+    # Don't update owner's nick, permissions error.
+    if user.id == user.guild.owner_id:
+        # logger.warn(f"Attempted to update user {user.id} ({user.name}), but they own this server.")
+        return False
+    # Don't update users who aren't registered.
+    return user_exists(user.id)
+
+
+# Update users nicknames to include sizetags.
+# Called for every message, so members whose record hasn't changed are skipped without reading it (see nickcache).
+# Anyone else is queued up, and their nickname is set a moment later by applyNick (see nickqueue).
+async def nickupdate(user):
+    if not canNick(user):
+        return
+
+    if nickcache.isCurrent(user.guild.id, user.id, recordVersion(user.id), user.nick):
+        nickcache.skipped += 1
+        return
+
+    nickqueue.enqueue(user)
+
+
+# Set a member's nickname from their record, if it isn't already right. True if it was edited.
+async def applyNick(user):
+    # They may have unregistered while waiting in the queue.
+    if not user_exists(user.id):
+        return False
+
+    version = recordVersion(user.id)
+    userdata = await store.get(user.id)
+    newnick = formatNick(userdata)
+
+    if newnick is None or newnick == user.nick:
+        nickcache.put(user.guild.id, user.id, version, newnick)
+        nickcache.skipped += 1
+        return False
+
     try:
         await user.edit(nick=newnick)
     except discord.Forbidden:
         logger.crit(f"Tried to nickupdate {user.id} ({user.name}), but it is forbidden!")
-        return
+        # Don't try again until their record changes.
+        nickcache.put(user.guild.id, user.id, version, None)
+        nickcache.failed += 1
+        return False
 
+    nickcache.put(user.guild.id, user.id, version, newnick)
+    nickcache.performed += 1
     #logger.msg(f"Updated user {user.id} ({user.name}).")
+    return True
+
+
+# Nickname edits waiting to be made, a few seconds' worth of updates per member at a time.
+nickqueue = NickQueue(applyNick)
+
+
+def user_exists(user_id):
+    return str(user_id) in registered
 
 
 # Read in specific user.
+@blockingio
 def read_user(user_id):
     user_id = str(user_id)
-    userfile = folder + "/users/" + user_id + ".txt"
-    with open(userfile) as f:
-        # Make array of lines from file.
-        content = f.readlines()
-        if content == []:
-            os.remove(userfile)
-        # Replace None.
-        if content[BWEI] == "None" + newline:
-            content[BWEI] = str(defaultweight) + newline
-        if content[BHEI] == "None" + newline:
-            content[BHEI] = str(defaultweight) + newline
-        if content[CHEI] == "None" + newline:
-            content[CHEI] = content[3]
-        # Round all values to 18 decimal places.
-        content[CHEI] = str(round(float(content[CHEI]), 18))
-        content[BHEI] = str(round(float(content[BHEI]), 18))
-        content[BWEI] = str(round(float(content[BWEI]), 18))
-        return content
-
-
-def read_userline(user_id, line):
-    content = read_user(user_id)
-    return content[line - 1]
+    user = read_stored_user(user_id)
+    state = slowchangestates.get(user_id)
+    if state is not None:
+        user.height = state.heightAt(time.time(), infinity)
+    return user
+
+
+def read_stored_user(user_id):
+    # Writes that haven't been flushed yet are the newest copy.
+    pending = writebehind.get(user_id)
+    if pending is not None:
+        return pending
+    cached = usercache.get(user_id, lambda: userstore.stamp(user_id))
+    if cached is not None:
+        return cached
+    stamp = userstore.stamp(user_id)
+    fields = userstore.read(user_id)
+    if fields == []:
+        userstore.delete(user_id)
+    user = User.fromFields(fields)
+    usercache.put(user_id, stamp, user)
+    return user
 
 
 # Write to specific user.
-def write_user(user_id, content):
+def write_user(user_id, user):
+    user_id = str(user_id)
+    registered.add(user_id)
+    indexUser(user_id, user)
+    bumpVersion(user_id)
+    state = slowchangestates.get(user_id)
+    if state is not None:
+        # Their slow change carries on from whatever they've been set to.
+        state = state.rebase(user.height, time.time())
+        slowchangestates[user_id] = state
+        jobstore.update(slowChangeKey(user_id), state=state.toSpec())
+    # No stamp until it's been flushed, so a failed flush means it's read back from storage.
+    usercache.put(user_id, None, user)
+    # The durable write happens in flush_user, once the write-behind window is up.
+    writebehind.put(user_id, user)
+
+
+@blockingio
+def flush_user(user_id, user):
+    userstore.write(user_id, user.toFields())
+    usercache.restamp(user_id, userstore.stamp(user_id))
+
+
+# Writes to the same user within this many seconds are saved together.
+writebehind = WriteBehind(flush_user, window=5)
+
+
+@blockingio
+def delete_user(user_id):
+    registered.discard(str(user_id))
+    unindexUser(user_id)
+    bumpVersion(user_id)
+    slowchangestates.pop(str(user_id), None)
+    jobstore.delete(slowChangeKey(user_id))
+    writebehind.delete(user_id, userstore.delete)
+    usercache.invalidate(user_id)
+
+
+# Use this from coroutines: `await store.get(id)` / `await store.put(id, user)`.
+# Time spent blocking the event loop either way is tracked in iostats.
+store = AsyncUserStore(read_user, write_user, delete_user)
+
+
+def slowChangeKey(user_id):
+    return f"slowchange:{user_id}"
+
+
+async def startSlowChange(user_id, kind, amount, period, guildid=None, channelid=None):
+    """Start changing a user's height every period seconds, replacing any slow change they had. The first step is now.
+
+    guildid and channelid are saved with it, for picking it back up after a restart."""
+    user_id = str(user_id)
+    async with store.lock(user_id):
+        userdata = await store.get(user_id)
+        if user_id in slowchangestates:
+            # Save where the old slow change got to, so the new one starts from there.
+            await store.put(user_id, userdata)
+        state = SlowChangeState(userdata.height, kind, amount, period, time.time())
+        slowchangestates[user_id] = state
+    jobstore.put(slowChangeKey(user_id), {
+        "type": "slowchange",
+        "userid": user_id,
+        "guildid": guildid,
+        "channelid": channelid,
+        "state": state.toSpec()
+    })
+
+
+async def stopSlowChange(user_id):
+    """Stop a user's slow change, saving the height it got to. False if they didn't have one."""
     user_id = str(user_id)
-    # Replace None.
-    if content[BWEI] == "None" + newline:
-        content[BWEI] = str(defaultweight) + newline
-    if content[BHEI] == "None" + newline:
-        content[BHEI] = str(defaultweight) + newline
-    if content[CHEI] == "None" + newline:
-        content[CHEI] = content[3]
-    # Round all values to 18 decimal places.
-    content[CHEI] = str(round(float(content[CHEI]), 18))
-    content[BHEI] = str(round(float(content[BHEI]), 18))
-    content[BWEI] = str(round(float(content[BWEI]), 18))
-    # Add new line characters to entries that don't have them.
-    for idx, item in enumerate(content):
-        if not content[idx].endswith("\n"):
-            content[idx] = content[idx] + "\n"
-    # Delete userfile.
-    os.remove(folder + "/users/" + user_id + ".txt")
-    # Make a new userfile.
-    with open(folder + "/users/" + user_id + ".txt", "w+") as userfile:
-        # Write content to lines.
-        userfile.writelines(content)
-
-
-def isFeetAndInchesAndIfSoFixIt(input):
-    regex = r"^(?P<feet>\d+(ft|foot|feet|\'))(?P<inch>\d+(in|\")*)"
-    m = re.match(regex, input, flags=re.I)
-    if not m:
-        return input
-    wholefeet = m.group('feet')
-    wholeinch = m.group('inch')
-    feet = getnum(wholefeet)
-    inch = getnum(wholeinch)
-    if feet is None:
-        feet = 0
-    if inch is None:
-        inch = 0
-    totalinches = (feet * 12) + inch
-    return f"{totalinches}in"
+    async with store.lock(user_id):
+        if user_id not in slowchangestates:
+            return False
+        userdata = await store.get(user_id)
+        slowchangestates.pop(user_id, None)
+        jobstore.delete(slowChangeKey(user_id))
+        await store.put(user_id, userdata)
+    return True
+
+
+async def saveSlowChange(user_id):
+    """Write the height a user's slow change has got to, so it isn't lost if SizeBot stops."""
+    async with store.lock(user_id):
+        if str(user_id) in slowchangestates:
+            await store.put(user_id, await store.get(user_id))
+
+
+def loadSlowChanges():
+    """Pick slow changes back up from the job store. Only done at startup.
+
+    Steps missed while SizeBot was down don't need replaying: read_user works out their height from the state.
+    A slow change that can't be picked back up is logged and dropped, rather than stopping SizeBot from starting."""
+    for key, spec in jobstore.all():
+        if spec.get("type") != "slowchange":
+            continue
+        user_id = str(spec.get("userid"))
+        try:
+            if not user_exists(user_id):
+                jobstore.delete(key)
+                continue
+            slowchangestates[user_id] = SlowChangeState.fromSpec(spec["state"])
+            # The indexes were built from their stored height.
+            indexUser(user_id, read_user(user_id))
+        except Exception as e:
+            slowchangestates.pop(user_id, None)
+            logger.crit(f"Dropping slow change {key}, it couldn't be loaded: {e!r}")
+            jobstore.delete(key)
+
+
+loadSlowChanges()
 
 
 # Count users.
 def getMemberCount():
-    path = folder + '/users'
-    files = os.listdir(path)
-    memberCount = len([f for f in files if f.endswith(".txt")])
-    return memberCount
+    return len(registered)
 
 logger.load("Loaded {0} users.".format(getMemberCount()))
 
@@ -289,101 +459,9 @@ enspace = "\u2002"
 printtab = enspace * 4
 
 
-# Slow growth tasks.
-tasks = {}
-
-# Unit constants.
-# Height [micrometers]
-inch = Decimal("25400")
-foot = inch * Decimal("12")
-mile = foot * Decimal("5280")
-ly = mile * Decimal("5879000000000")
-au = Decimal("149597870700000000")
-uni = Decimal("879848000000000000000000000000000")
-infinity = Decimal("879848000000000000000000000000000000000000000000000000000000")
-# Weight [milligrams]
-ounce = Decimal("28350")
-pound = ounce * Decimal("16")
-uston = pound * Decimal("2000")
-earth = Decimal("5972198600000000000000000000000")
-sun = Decimal("1988435000000000000000000000000000000")
-milkyway = Decimal("95000000000000000000000000000000000000000000000")
-uniw = Decimal("3400000000000000000000000000000000000000000000000000000000000")
-
-
 # Convert any supported height to 'size value'
 def toSV(value, unit):
-    if value is None or unit is None:
-        return None
-    value = Decimal(value)
-    unitlower = unit.lower()
-    if unitlower in ["yoctometers", "yoctometer"] or unit == "ym":
-        valueSV = value / Decimal("1E18")
-    elif unitlower in ["zeptometers", "zeptometer"] or unit == "zm":
-        valueSV = value / Decimal("1E15")
-    elif unitlower in ["attometers", "attometer"] or unit == "am":
-        valueSV = value / Decimal("1E12")
-    elif unitlower in ["femtometers", "femtometer"] or unit == "fm":
-        valueSV = value / Decimal("1E9")
-    elif unitlower in ["picometers", "picometer"] or unit == "pm":
-        valueSV = value / Decimal("1E6")
-    elif unitlower in ["nanometers", "nanometer"] or unit == "nm":
-        valueSV = value / Decimal("1E3")
-    elif unitlower in ["micrometers", "micrometer"] or unit in ["um", "µm"]:
-        valueSV = value
-    elif unitlower in ["millimeters", "millimeter"] or unit == "mm":
-        valueSV = value * Decimal("1E3")
-    elif unitlower in ["centimeters", "centimeter"] or unit == "cm":
-        valueSV = value * Decimal("1E4")
-    elif unitlower in ["meters", "meter"] or unit == "m":
-        valueSV = value * Decimal("1E6")
-    elif unitlower in ["kilometers", "kilometer"] or unit == "km":
-        valueSV = value * Decimal("1E9")
-    elif unitlower in ["megameters", "megameter"] or unit == "Mm":
-        valueSV = value * Decimal("1E12")
-    elif unitlower in ["gigameters", "gigameter"] or unit == "Gm":
-        valueSV = value * Decimal("1E15")
-    elif unitlower in ["terameters", "terameter"] or unit == "Tm":
-        valueSV = value * Decimal("1E18")
-    elif unitlower in ["petameters", "petameter"] or unit == "Pm":
-        valueSV = value * Decimal("1E21")
-    elif unitlower in ["exameters", "exameter"] or unit == "Em":
-        valueSV = value * Decimal("1E24")
-    elif unitlower in ["zettameters", "zettameter"] or unit == "Zm":
-        valueSV = value * Decimal("1E27")
-    elif unitlower in ["yottameters", "yottameter"] or unit == "Ym":
-        valueSV = value * Decimal("1E30")
-    elif unitlower in ["inches", "inch", "in", "\""]:
-        valueSV = value * inch
-    elif unitlower in ["feet", "foot", "ft", "\'"]:
-        valueSV = value * foot
-    elif unitlower in ["miles", "mile", "mi"]:
-        valueSV = value * mile
-    elif unitlower in ["lightyears", "lightyear"] or unit == "ly":
-        valueSV = value * ly
-    elif unitlower in ["astronomical_units", "astronomical_unit"] or unit == "AU":
-        valueSV = value * au
-    elif unitlower in ["universes", "universe"] or unit == "uni":
-        valueSV = value * uni
-    elif unitlower in ["kilouniverses", "kilouniverse"] or unit == "kuni":
-        valueSV = value * uni * Decimal("1E3")
-    elif unitlower in ["megauniverses", "megauniverse"] or unit == "Muni":
-        valueSV = value * uni * Decimal("1E6")
-    elif unitlower in ["gigauniverses", "gigauniverse"] or unit == "Guni":
-        valueSV = value * uni * Decimal("1E9")
-    elif unitlower in ["terauniverses", "terauniverse"] or unit == "Tuni":
-        valueSV = value * uni * Decimal("1E12")
-    elif unitlower in ["petauniverses", "petauniverse"] or unit == "Puni":
-        valueSV = value * uni * Decimal("1E15")
-    elif unitlower in ["exauniverses", "exauniverse"] or unit == "Euni":
-        valueSV = value * uni * Decimal("1E18")
-    elif unitlower in ["zettauniverses", "zettauniverse"] or unit == "Zuni":
-        valueSV = value * uni * Decimal("1E21")
-    elif unitlower in ["yottauniverses", "yottauniverse"] or unit == "Yuni":
-        valueSV = value * uni * Decimal("1E24")
-    else:
-        return None
-    return valueSV
+    return lengths.convert(value, unit)
 
 
 # Convert 'size values' to a more readable format (metric to 3 decimal places)
@@ -394,266 +472,30 @@ def fromSVacc(value):
 # Convert 'size values' to a more readable format (metric)
 def fromSV(value, accuracy=2):
     value = Decimal(value)
-    if value <= Decimal("0"):
+    if value <= 0:
         return "0"
-
-    if value < Decimal("1E-15"):
-        scale, unit = Decimal("1E-18"), "ym"
-    elif value < Decimal("1E-12"):
-        scale, unit = Decimal("1E-15"), "zm"
-    elif value < Decimal("1E-9"):
-        scale, unit = Decimal("1E-12"), "am"
-    elif value < Decimal("1E-6"):
-        scale, unit = Decimal("1E-9"), "fm"
-    elif value < Decimal("1E-3"):
-        scale, unit = Decimal("1E-6"), "pm"
-    elif value < Decimal("1E0"):
-        scale, unit = Decimal("1E-3"), "nm"
-    elif value < Decimal("1E2"):
-        scale, unit = Decimal("1E0"), "µm"
-    elif value < Decimal("1E4"):
-        scale, unit = Decimal("1E3"), "mm"
-    elif value < Decimal("1E6"):
-        scale, unit = Decimal("1E4"), "cm"
-    elif value < Decimal("1E9"):
-        scale, unit = Decimal("1E6"), "m"
-    elif value < Decimal("1E12"):
-        scale, unit = Decimal("1E9"), "km"
-    elif value < Decimal("1E15"):
-        scale, unit = Decimal("1E12"), "Mm"
-    elif value < Decimal("1E18"):
-        scale, unit = Decimal("1E15"), "Gm"
-    elif value < Decimal("1E21"):
-        scale, unit = Decimal("1E18"), "Tm"
-    elif value < Decimal("1E24"):
-        scale, unit = Decimal("1E21"), "Pm"
-    elif value < Decimal("1E27"):
-        scale, unit = Decimal("1E24"), "Em"
-    elif value < Decimal("1E30"):
-        scale, unit = Decimal("1E27"), "Zm"
-    elif value < uni:
-        scale, unit = Decimal("1E30"), "Ym"
-    elif value < uni * Decimal("1E3"):
-        scale, unit = uni, "uni"
-    elif value < uni * Decimal("1E6"):
-        scale, unit = uni * Decimal("1E3"), "kuni"
-    elif value < uni * Decimal("1E9"):
-        scale, unit = uni * Decimal("1E6"), "Muni"
-    elif value < uni * Decimal("1E12"):
-        scale, unit = uni * Decimal("1E9"), "Guni"
-    elif value < uni * Decimal("1E15"):
-        scale, unit = uni * Decimal("1E12"), "Tuni"
-    elif value < uni * Decimal("1E18"):
-        scale, unit = uni * Decimal("1E15"), "Puni"
-    elif value < uni * Decimal("1E21"):
-        scale, unit = uni * Decimal("1E18"), "Euni"
-    elif value < uni * Decimal("1E24"):
-        scale, unit = uni * Decimal("1E21"), "Zuni"
-    elif value < uni * Decimal("1E27"):
-        scale, unit = uni * Decimal("1E24"), "Yuni"
-    else:
-        return "∞"
-
-    return f"{trimzeroes(round(value / scale, accuracy)):,}{unit}"
+    return lengthscales.format(value, accuracy)
 
 
 # Convert 'size values' to a more readable format (USA)
 def fromSVUSA(value, accuracy=2):
     value = Decimal(value)
-    if value <= Decimal("0"):
+    if value <= 0:
         return "0"
-
-    if value < Decimal("1E-15"):
-        scale, unit = Decimal("1E-18"), "ym"
-    elif value < Decimal("1E-12"):
-        scale, unit = Decimal("1E-15"), "zm"
-    elif value < Decimal("1E-9"):
-        scale, unit = Decimal("1E-12"), "am"
-    elif value < Decimal("1E-6"):
-        scale, unit = Decimal("1E-9"), "fm"
-    elif value < Decimal("1E-3"):
-        scale, unit = Decimal("1E-6"), "pm"
-    elif value < Decimal("1E0"):
-        scale, unit = Decimal("1E-3"), "nm"
-    elif value < Decimal("1E2"):
-        scale, unit = Decimal("1E0"), "µm"
-    elif value < Decimal("1E4"):
-        scale, unit = Decimal("1E3"), "mm"
-    elif value < foot:
-        scale, unit = inch, "in"
-    elif value < mile:
-        inchval = value / inch                  # convert to inches
-        feetval, inchval = divmod(inchval, 12)  # divide by 12 to get feet, and the remainder inches
-        roundedinchval = trimzeroes(round(inchval, accuracy))
-        return f"{feetval:,}'{roundedinchval}\""
-    elif value < au:
-        scale, unit = mile, "mi"
-    elif value < ly:
-        scale, unit = au, "AU"
-    elif value < uni / 10:
-        scale, unit = ly, "ly"
-    elif value < uni * Decimal("1E3"):
-        scale, unit = uni, "uni"
-    elif value < uni * Decimal("1E6"):
-        scale, unit = uni * Decimal("1E3"), "kuni"
-    elif value < uni * Decimal("1E9"):
-        scale, unit = uni * Decimal("1E6"), "Muni"
-    elif value < uni * Decimal("1E12"):
-        scale, unit = uni * Decimal("1E9"), "Guni"
-    elif value < uni * Decimal("1E15"):
-        scale, unit = uni * Decimal("1E12"), "Tuni"
-    elif value < uni * Decimal("1E18"):
-        scale, unit = uni * Decimal("1E15"), "Puni"
-    elif value < uni * Decimal("1E21"):
-        scale, unit = uni * Decimal("1E18"), "Euni"
-    elif value < uni * Decimal("1E24"):
-        scale, unit = uni * Decimal("1E21"), "Zuni"
-    elif value < uni * Decimal("1E27"):
-        scale, unit = uni * Decimal("1E24"), "Yuni"
-    else:
-        return "∞"
-
-    return f"{trimzeroes(round(value / scale, accuracy)):,}{unit}"
+    return lengthscalesUSA.format(value, accuracy)
 
 
 # Convert any supported weight to 'weight value', or milligrams.
 def toWV(value, unit):
-    value = Decimal(value)
-    unitlower = unit.lower()
-    if unitlower in ["yoctograms", "yoctograms"] or unit == "yg":
-        valueWV = value / Decimal("1E21")
-    elif unitlower in ["zeptograms", "zeptograms"] or unit == "zg":
-        valueWV = value / Decimal("1E18")
-    elif unitlower in ["attograms", "attogram"] or unit == "ag":
-        valueWV = value / Decimal("1E15")
-    elif unitlower in ["femtogram", "femtogram"] or unit == "fg":
-        valueWV = value / Decimal("1E12")
-    elif unitlower in ["picogram", "picogram"] or unit == "pg":
-        valueWV = value / Decimal("1E9")
-    elif unitlower in ["nanogram", "nanogram"] or unit == "ng":
-        valueWV = value / Decimal("1E6")
-    elif unitlower in ["microgram", "microgram"] or unit in ["ug", "µg"]:
-        valueWV = value / Decimal("1E3")
-    elif unitlower in ["milligrams", "milligram"] or unit == "mg":
-        valueWV = value
-    elif unitlower in ["grams", "gram"] or unit == "g":
-        valueWV = value * Decimal("1E3")
-    elif unitlower in ["kilograms", "kilogram"] or unit == "kg":
-        valueWV = value * Decimal("1E6")
-    elif unitlower in ["megagrams", "megagram", "ton", "tons", "tonnes", "tons"] or unit == "t":
-        valueWV = value * Decimal("1E9")
-    elif unitlower in ["gigagrams", "gigagram", "kilotons", "kiloton", "kilotonnes", "kilotonne"] or unit in ["Gg", "kt"]:
-        valueWV = value * Decimal("1E12")
-    elif unitlower in ["teragrams", "teragram", "megatons", "megaton", "megatonnes", "megatonne"] or unit in ["Tg", "Mt"]:
-        valueWV = value * Decimal("1E15")
-    elif unitlower in ["petagrams", "petagram", "gigatons", "gigaton", "gigatonnes", "gigatonnes"] or unit in ["Pg", "Gt"]:
-        valueWV = value * Decimal("1E18")
-    elif unitlower in ["exagrams", "exagram", "teratons", "teraton", "teratonnes", "teratonne"] or unit in ["Eg", "Tt"]:
-        valueWV = value * Decimal("1E21")
-    elif unitlower in ["zettagrams", "zettagram", "petatons", "petaton", "petatonnes", "petatonne"] or unit in ["Zg", "Pt"]:
-        valueWV = value * Decimal("1E24")
-    elif unitlower in ["yottagrams", "yottagram", "exatons", "exaton", "exatonnes", "exatonne"] or unit in ["Yg", "Et"]:
-        valueWV = value * Decimal("1E27")
-    elif unitlower in ["zettatons", "zettaton", "zettatonnes", "zettatonne"] or unit == "Zt":
-        valueWV = value * Decimal("1E30")
-    elif unitlower in ["yottatons", "yottaton", "yottatonnes", "yottatonne"] or unit == "Yt":
-        valueWV = value * Decimal("1E33")
-    elif unitlower in ["universes", "universe"] or unit == "uni":
-        valueWV = value * uniw
-    elif unitlower in ["kilouniverses", "kilouniverse"] or unit == "kuni":
-        valueWV = value * uniw * Decimal("1E3")
-    elif unitlower in ["megauniverses", "megauniverse"] or unit == "Muni":
-        valueWV = value * uniw * Decimal("1E6")
-    elif unitlower in ["gigauniverses", "gigauniverse"] or unit == "Guni":
-        valueWV = value * uniw * Decimal("1E9")
-    elif unitlower in ["terauniverses", "terauniverse"] or unit == "Tuni":
-        valueWV = value * uniw * Decimal("1E12")
-    elif unitlower in ["petauniverses", "petauniverse"] or unit == "Puni":
-        valueWV = value * uniw * Decimal("1E15")
-    elif unitlower in ["exauniverses", "exauniverse"] or unit == "Euni":
-        valueWV = value * uniw * Decimal("1E18")
-    elif unitlower in ["zettauniverses", "zettauniverse"] or unit == "Zuni":
-        valueWV = value * uniw * Decimal("1E21")
-    elif unitlower in ["yottauniverses", "yottauniverse"] or unit == "Yuni":
-        valueWV = value * uniw * Decimal("1E24")
-    elif unitlower in ["ounces", "ounce"] or unit == "oz":
-        valueWV = value * ounce
-    elif unitlower in ["pounds", "pound"] or unit in ["lb", "lbs"]:
-        valueWV = value * pound
-    elif unitlower in ["earth", "earths"]:
-        valueWV = value * earth
-    elif unitlower in ["sun", "suns"]:
-        valueWV = value * sun
-    else:
-        return None
-    return valueWV
+    return weights.convert(value, unit)
 
 
 # Convert 'weight values' to a more readable format
 def fromWV(value, accuracy=1):
     value = Decimal(value)
-    if value <= Decimal("0"):
+    if value <= 0:
         return "0"
-    if value < Decimal("1E-18"):
-        scale, unit = Decimal("1E-21"), "yg"
-    elif value < Decimal("1E-15"):
-        scale, unit = Decimal("1E-18"), "zg"
-    elif value < Decimal("1E-12"):
-        scale, unit = Decimal("1E-15"), "ag"
-    elif value < Decimal("1E-9"):
-        scale, unit = Decimal("1E-12"), "fg"
-    elif value < Decimal("1E-6"):
-        scale, unit = Decimal("1E-9"), "pg"
-    elif value < Decimal("1E-3"):
-        scale, unit = Decimal("1E-6"), "ng"
-    elif value < Decimal("1E0"):
-        scale, unit = Decimal("1E-3"), "µg"
-    elif value < Decimal("1E3"):
-        scale, unit = Decimal("1E0"), "mg"
-    elif value < Decimal("1E6"):
-        scale, unit = Decimal("1E3"), "g"
-    elif value < Decimal("1E9"):
-        scale, unit = Decimal("1E6"), "kg"
-    elif value < Decimal("1E12"):
-        scale, unit = Decimal("1E9"), "t"
-    elif value < Decimal("1E15"):
-        scale, unit = Decimal("1E12"), "kt"
-    elif value < Decimal("1E18"):
-        scale, unit = Decimal("1E15"), "Mt"
-    elif value < Decimal("1E21"):
-        scale, unit = Decimal("1E18"), "Gt"
-    elif value < Decimal("1E24"):
-        scale, unit = Decimal("1E21"), "Tt"
-    elif value < Decimal("1E27"):
-        scale, unit = Decimal("1E24"), "Pt"
-    elif value < Decimal("1E30"):
-        scale, unit = Decimal("1E27"), "Et"
-    elif value < Decimal("1E33"):
-        scale, unit = Decimal("1E30"), "Zt"
-    elif value < uniw:
-        scale, unit = Decimal("1E33"), "Yt"
-    elif value < uniw * Decimal("1E3"):
-        scale, unit = uniw, "uni"
-    elif value < uniw * Decimal("1E6"):
-        scale, unit = uniw * Decimal("1E3"), "kuni"
-    elif value < uniw * Decimal("1E9"):
-        scale, unit = uniw * Decimal("1E6"), "Muni"
-    elif value < uniw * Decimal("1E12"):
-        scale, unit = uniw * Decimal("1E9"), "Guni"
-    elif value < uniw * Decimal("1E15"):
-        scale, unit = uniw * Decimal("1E12"), "Tuni"
-    elif value < uniw * Decimal("1E18"):
-        scale, unit = uniw * Decimal("1E15"), "Puni"
-    elif value < uniw * Decimal("1E21"):
-        scale, unit = uniw * Decimal("1E18"), "Euni"
-    elif value < uniw * Decimal("1E24"):
-        scale, unit = uniw * Decimal("1E21"), "Zuni"
-    elif value < uniw * Decimal("1E27"):
-        scale, unit = uniw * Decimal("1E24"), "Yuni"
-    else:
-        return "∞"
-
-    return f"{trimzeroes(round(value / scale, accuracy)):,}{unit}"
+    return weightscales.format(value, accuracy)
 
 
 # Convert 'weight values' to a more readable format (USA)
@@ -661,58 +503,7 @@ def fromWVUSA(value, accuracy=1):
     value = Decimal(value)
     if value == 0:
         return "almost nothing"
-    if value < Decimal("1E-18"):
-        scale, unit = Decimal("1E-21"), "yg"
-    elif value < Decimal("1E-15"):
-        scale, unit = Decimal("1E-18"), "zg"
-    elif value < Decimal("1E-12"):
-        scale, unit = Decimal("1E-15"), "ag"
-    elif value < Decimal("1E-9"):
-        scale, unit = Decimal("1E-12"), "fg"
-    elif value < Decimal("1E-6"):
-        scale, unit = Decimal("1E-9"), "pg"
-    elif value < Decimal("1E-3"):
-        scale, unit = Decimal("1E-6"), "ng"
-    elif value < Decimal("1E0"):
-        scale, unit = Decimal("1E-3"), "µg"
-    elif value < Decimal("1E3"):
-        scale, unit = Decimal("1E0"), "mg"
-    elif value < ounce / 10:
-        scale, unit = Decimal("1E3"), "g"
-    elif value < pound:
-        scale, unit = ounce, "oz"
-    elif value < uston:
-        scale, unit = pound, "lb"
-    elif value < earth / 10:
-        scale, unit = uston, " US tons"
-    elif value < sun / 10:
-        scale, unit = earth, "Earths"
-    elif value < milkyway:
-        scale, unit = sun, " Suns"
-    elif value < uniw:
-        scale, unit = milkyway, " Milky Ways"
-    elif value < uniw * Decimal("1E3"):
-        scale, unit = uniw, "uni"
-    elif value < uniw * Decimal("1E6"):
-        scale, unit = uniw * Decimal("1E3"), "kuni"
-    elif value < uniw * Decimal("1E9"):
-        scale, unit = uniw * Decimal("1E6"), "Muni"
-    elif value < uniw * Decimal("1E12"):
-        scale, unit = uniw * Decimal("1E9"), "Guni"
-    elif value < uniw * Decimal("1E15"):
-        scale, unit = uniw * Decimal("1E12"), "Tuni"
-    elif value < uniw * Decimal("1E18"):
-        scale, unit = uniw * Decimal("1E15"), "Puni"
-    elif value < uniw * Decimal("1E21"):
-        scale, unit = uniw * Decimal("1E18"), "Euni"
-    elif value < uniw * Decimal("1E24"):
-        scale, unit = uniw * Decimal("1E21"), "Zuni"
-    elif value < uniw * Decimal("1E27"):
-        scale, unit = uniw * Decimal("1E24"), "Yuni"
-    else:
-        return "∞"
-
-    return f"{trimzeroes(round(value / scale, accuracy)):,}{unit}"
+    return weightscalesUSA.format(value, accuracy)
 
 
 def shoeFormat(v):
@@ -1,5 +1,6 @@
 from sizebot.globalsb import *
 import sizebot.digilogger as logger
+from sizebot.resync import Resync
 
 def main():
     launch = datetime.now()
@@ -21,6 +22,7 @@ def main():
         'sizebot.cogs.change',
         'sizebot.cogs.dm',
         'sizebot.cogs.fun',
+        'sizebot.cogs.leaderboard',
         'sizebot.cogs.mod',
         'sizebot.cogs.monika',
         'sizebot.cogs.register',
@@ -39,6 +41,9 @@ def main():
     bot.remove_command("help")
     bot.add_check(check)
 
+    # `python -m sizebot --resync` resets every registered member's sizetag once connected (see sizebot.resync).
+    resyncpending = "--resync" in sys.argv[1:]
+
 
     @bot.event
     # Output header.
@@ -56,6 +61,13 @@ def main():
         logger.test(f"SizeBot launched in {round((elapsed.total_seconds() * 1000), 3)} milliseconds.")
         print()
 
+        # on_ready fires again after reconnecting, but the resync only needs to happen once.
+        nonlocal resyncpending
+        if resyncpending:
+            resyncpending = False
+            for guild in bot.guilds:
+                asyncio.ensure_future(Resync(guild).run())
+
 
     @bot.event
     async def on_message(message):
@@ -71,6 +83,14 @@ def main():
 
     bot.run(authtoken)
 
+    # Let any queued user writes finish.
+    store.shutdown()
+    writebehind.flush()
+    jobstore.flush()
+    logger.msg(str(iostats))
+    logger.msg(str(nickcache))
+    logger.msg(str(nickqueue))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,79 @@
+from decimal import Decimal, localcontext
+from functools import lru_cache
+
+from sizebot.globalsb import defaultheight, defaultweight, toShoeSize
+from sizebot.objects import lookslike
+from sizebot.precision import tierFor
+
+# Conversion constants.
+footfactor = Decimal(1) / Decimal(7)
+footwidthfactor = footfactor / Decimal(2.5)
+footthickfactor = Decimal(1) / Decimal(65)
+thumbfactor = Decimal(1) / Decimal(69.06)
+fingerprintfactor = Decimal(1) / Decimal(35080)
+hairwidthfactor = Decimal(1) / Decimal(23387)
+pointerfactor = Decimal(1) / Decimal(17.26)
+
+
+# How to work out each measurement, from the size and other measurements.
+formulas = {
+    "multiplier": lambda m: m.height / m.baseheight,
+    "multipliercubed": lambda m: m.multiplier ** 3,
+    "defmultiplier": lambda m: m.height / defaultheight,
+    "defmultipliercubed": lambda m: m.defmultiplier ** 3,
+    "weight": lambda m: m.baseweight * m.multipliercubed * m.density,
+    "footlength": lambda m: m.height * footfactor,
+    "footwidth": lambda m: m.height * footwidthfactor,
+    "toeheight": lambda m: m.height * footthickfactor,
+    "pointer": lambda m: m.height * pointerfactor,
+    "thumbwidth": lambda m: m.height * thumbfactor,
+    "fingerprintdepth": lambda m: m.height * fingerprintfactor,
+    "hairwidth": lambda m: m.height * hairwidthfactor,
+    "relativedefaultheight": lambda m: defaultheight / m.defmultiplier,
+    "relativedefaultweight": lambda m: defaultweight / m.defmultipliercubed,
+    "shoesize": lambda m: toShoeSize(m.footlength),
+    "lookslike": lambda m: lookslike(m.height)
+}
+
+
+class Measurements:
+    """Everything derived from one size (see formulas), worked out the first time it's asked for.
+
+    Formatted values are kept too, since popular sizes get shown over and over."""
+
+    def __init__(self, height, baseheight, baseweight, density):
+        self.height = height
+        self.baseheight = baseheight
+        self.baseweight = baseweight
+        self.density = density
+        self.context = tierFor(height, baseheight, defaultheight)
+        self._formatted = {}
+
+    def __getattr__(self, name):
+        # Only called for measurements that haven't been worked out yet.
+        formula = formulas.get(name)
+        if formula is None:
+            raise AttributeError(name)
+        with localcontext(self.context):
+            value = formula(self)
+        setattr(self, name, value)
+        return value
+
+    def format(self, name, formatter):
+        """formatter(measurement), worked out once per measurement and formatter."""
+        key = (name, formatter)
+        formatted = self._formatted.get(key)
+        if formatted is None:
+            formatted = formatter(getattr(self, name))
+            self._formatted[key] = formatted
+        return formatted
+
+
+# A changed user record means a new key, so stale entries just age out.
+@lru_cache(maxsize=512)
+def measure(height, baseheight, baseweight, density):
+    return Measurements(height, baseheight, baseweight, density)
+
+
+def measureUser(user):
+    return measure(user.height, user.baseheight, user.baseweight, user.density)
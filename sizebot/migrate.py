@@ -0,0 +1,67 @@
+import os
+import sys
+from pathlib import Path
+
+from sizebot.storage import TextUserStore, SQLiteUserStore
+from sizebot.user import User
+
+
+def iterTextUsers(store):
+    for userid in store.ids():
+        fields = store.read(userid)
+        if not fields:
+            print(f"Skipping empty user file for {userid}.")
+            continue
+        # Read and write it back the way SizeBot would, which fills in fields older files are missing.
+        yield userid, User.fromFields(fields).toFields()
+
+
+def migrate(folder):
+    """Import every user file in folder/users into folder/users.db
+
+    A new database is built beside it and only moved into place once every user is in, since SizeBot uses
+    users.db instead of the user files as soon as it exists. Importing into an existing database is one
+    transaction, so a failed import leaves it as it was."""
+    folder = Path(folder)
+    dbpath = folder / "users.db"
+    if dbpath.exists():
+        return importUsers(folder / "users", dbpath)
+    temppath = folder / "users.db.tmp"
+    removeDatabase(temppath)
+    try:
+        count = importUsers(folder / "users", temppath)
+    except BaseException:
+        removeDatabase(temppath)
+        raise
+    os.replace(temppath, dbpath)
+    return count
+
+
+def importUsers(userspath, dbpath):
+    textstore = TextUserStore(userspath)
+    dbstore = SQLiteUserStore(dbpath)
+    try:
+        dbstore.writemany(iterTextUsers(textstore))
+        count = dbstore.count()
+    finally:
+        dbstore.close()
+    return count
+
+
+def removeDatabase(path):
+    # Along with any journal files SQLite left beside it.
+    for p in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else ".."
+    count = migrate(folder)
+    print(f"Migrated users into {Path(folder) / 'users.db'}. It now has {count} users.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class NickCache:
+    """The last nickname worked out for each member, and the version of the user record it came from.
+
+    While a member's record version and nickname still match, nickupdate can skip them without reading the record.
+    Only used from the event loop, so there's no lock."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.skipped = 0
+        self.performed = 0
+        self.failed = 0
+        self._entries = OrderedDict()  # (guildid, userid) -> (version, nick), nick is None if there's nothing to set
+
+    def __len__(self):
+        return len(self._entries)
+
+    def isCurrent(self, guildid, userid, version, currentnick):
+        """True if the member's nickname is already what their record at this version says it should be."""
+        entry = self._entries.get((guildid, str(userid)))
+        if entry is None:
+            return False
+        cachedversion, nick = entry
+        if cachedversion != version:
+            return False
+        # Somebody else renamed them since, so it needs setting again.
+        if nick is not None and nick != currentnick:
+            return False
+        self._entries.move_to_end((guildid, str(userid)))
+        return True
+
+    def put(self, guildid, userid, version, nick):
+        key = (guildid, str(userid))
+        self._entries[key] = (version, nick)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "skipped": self.skipped,
+            "performed": self.performed,
+            "failed": self.failed
+        }
+
+    def __str__(self):
+        s = self.stats()
+        return (f"{s['size']}/{s['maxsize']} nicknames cached, "
+                f"{s['performed']} nickname edits made, {s['skipped']} skipped, {s['failed']} failed")
@@ -0,0 +1,104 @@
+import asyncio
+from collections import OrderedDict
+
+import discord
+
+import sizebot.digilogger as logger
+
+
+class NickQueue:
+    """Nickname edits waiting to be made, one queue per guild.
+
+    Each guild's worker waits `delay` seconds before starting, so a burst of updates for the same member
+    becomes one edit, made from their latest record. When Discord rate limits us, the worker waits out the
+    retry-after and spaces out that guild's edits more, easing off again as edits go through.
+    At most `maxconcurrent` edits are in flight across all guilds."""
+
+    def __init__(self, apply, delay=2.0, maxconcurrent=2, minspacing=0.25, maxspacing=60.0):
+        self._apply = apply  # async apply(member), makes one member's nickname edit
+        self.delay = delay
+        self.maxconcurrent = maxconcurrent
+        self.minspacing = minspacing
+        self.maxspacing = maxspacing
+        self.enqueued = 0
+        self.debounced = 0
+        self.ratelimited = 0
+        self._pending = {}  # guildid -> OrderedDict of userid -> member
+        self._spacing = {}  # guildid -> seconds to wait between edits
+        self._workers = {}  # guildid -> worker task
+        self._semaphore = None  # made on first use, so it belongs to the bot's event loop
+
+    def __len__(self):
+        return sum(len(pending) for pending in self._pending.values())
+
+    def enqueue(self, member):
+        guildid = member.guild.id
+        pending = self._pending.setdefault(guildid, OrderedDict())
+        if member.id in pending:
+            self.debounced += 1
+        self.enqueued += 1
+        # Keep their place in line, but edit using the newest member object.
+        pending[member.id] = member
+        if guildid not in self._workers:
+            self._workers[guildid] = asyncio.ensure_future(self._work(guildid))
+
+    async def _work(self, guildid):
+        try:
+            await asyncio.sleep(self.delay)
+            pending = self._pending[guildid]
+            while pending:
+                userid, member = pending.popitem(last=False)
+                spacing = self._spacing.get(guildid, self.minspacing)
+                try:
+                    await self._edit(member)
+                except discord.HTTPException as e:
+                    if e.status != 429:
+                        logger.crit(f"Nickname update for {userid} failed: {e}")
+                        continue
+                    self.ratelimited += 1
+                    retryafter = retryAfter(e, spacing)
+                    self._spacing[guildid] = min(max(spacing * 2, retryafter), self.maxspacing)
+                    logger.warn(f"Rate limited updating nicknames in guild {guildid}, retrying in {retryafter:.1f}s.")
+                    # Back to the front of the line, unless a newer update came in while we were trying.
+                    if userid not in pending:
+                        pending[userid] = member
+                        pending.move_to_end(userid, last=False)
+                    await asyncio.sleep(retryafter)
+                    continue
+                except Exception as e:
+                    # Don't let one bad record stop everyone else's updates.
+                    logger.crit(f"Nickname update for {userid} failed: {e!r}")
+                    continue
+                self._spacing[guildid] = max(spacing / 2, self.minspacing)
+                if pending:
+                    await asyncio.sleep(self._spacing[guildid])
+        finally:
+            # Nothing can be enqueued between the queue emptying and here, so nothing is left behind.
+            del self._workers[guildid]
+
+    async def _edit(self, member):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.maxconcurrent)
+        async with self._semaphore:
+            await self._apply(member)
+
+    def stats(self):
+        return {
+            "pending": len(self),
+            "enqueued": self.enqueued,
+            "debounced": self.debounced,
+            "ratelimited": self.ratelimited
+        }
+
+    def __str__(self):
+        s = self.stats()
+        return (f"{s['enqueued']} nickname updates queued, {s['debounced']} merged into an earlier update, "
+                f"{s['ratelimited']} rate limited, {s['pending']} still waiting")
+
+
+def retryAfter(e, default):
+    """How long Discord asked us to wait before trying again, in seconds."""
+    try:
+        return float(e.response.headers["Retry-After"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return default
@@ -0,0 +1,70 @@
+import importlib.resources as pkg_resources
+from decimal import Decimal
+
+import sizebot.data
+from sizebot.sizeindex import SizeIndex, logSize
+from sizebot.sizeparser import parseHeight, parseWeight
+from sizebot.units import trimzeroes
+
+
+class SizeObject:
+    """A real-world thing to compare sizes against. length is in micrometers, mass in milligrams (or None)."""
+    __slots__ = ["name", "length", "mass"]
+
+    def __init__(self, name, length, mass=None):
+        self.name = name
+        self.length = length
+        self.mass = mass
+
+    def __repr__(self):
+        return f"SizeObject({self.name!r}, {self.length!r}, {self.mass!r})"
+
+
+def loadObjects(text):
+    objects = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, length, mass = (field.strip() for field in line.split("|"))
+        objects.append(SizeObject(name, parseHeight(length), None if mass == "-" else parseWeight(mass)))
+    return objects
+
+
+objects = loadObjects(pkg_resources.read_text(sizebot.data, "objects.txt"))
+objectsbyname = {o.name: o for o in objects}
+
+# Objects sorted by log10 length and mass, so the closest ones are a bisect away.
+lengthindex = SizeIndex()
+massindex = SizeIndex()
+for o in objects:
+    lengthindex.update(o.name, logSize(o.length))
+    if o.mass is not None:
+        massindex.update(o.name, logSize(o.mass))
+
+
+def nearestByLength(length, k=1):
+    """The k objects closest in length, closest first."""
+    return [objectsbyname[name] for name, loglength in lengthindex.nearest(logSize(length), k)]
+
+
+def nearestByMass(mass, k=1):
+    """The k objects closest in mass, closest first."""
+    return [objectsbyname[name] for name, logmass in massindex.nearest(logSize(mass), k)]
+
+
+def timesAs(value, objectvalue):
+    ratio = value / objectvalue
+    if ratio > Decimal("1E15") or ratio < Decimal("1E-15"):
+        return f"{ratio:.2e}x"
+    if ratio >= 1:
+        return f"{trimzeroes(round(ratio, 2)):,}x"
+    return f"{ratio:.3g}x"
+
+
+def lookslike(height):
+    """A few words relating height to the closest object in length."""
+    if height <= 0:
+        return "nothing at all"
+    o = nearestByLength(height)[0]
+    return f"{timesAs(height, o.length)} the size of {o.name}"
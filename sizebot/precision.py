@@ -0,0 +1,45 @@
+from decimal import Context, localcontext, ROUND_HALF_EVEN, Overflow, DivisionByZero, InvalidOperation
+
+
+def makeContext(prec):
+    return Context(prec=prec, rounding=ROUND_HALF_EVEN, Emin=-9999999, Emax=999999,
+                   capitals=1, clamp=0, flags=[], traps=[Overflow, DivisionByZero, InvalidOperation])
+
+
+# Precision tiers.
+# Display math: everything we show is rounded to a few digits.
+FAST = makeContext(50)
+# Universe-scale sizes, huge spreads between sizes, and log/exp round trips.
+HIGH = makeContext(250)
+
+# Largest magnitude (power of ten) FAST is used for. Sizes are in micrometers, so this is a yottameter.
+fastlimit = 30
+# Digits FAST needs on top of a value's own, to round it to a few decimal places.
+guard = 10
+
+
+def tierFor(*values):
+    """The cheapest context that keeps rendered output exact for math on these values.
+
+    Ratios between them get cubed, so their spread of magnitudes counts three times over."""
+    exponents = [v.adjusted() for v in values if v.is_finite() and v != 0]
+    if not exponents:
+        return FAST
+    if max(exponents) > fastlimit:
+        return HIGH
+    if (max(exponents) - min(exponents)) * 3 + guard > FAST.prec:
+        return HIGH
+    return FAST
+
+
+def precise(*values):
+    """Context manager for math on these values, at the tier they need."""
+    return localcontext(tierFor(*values))
+
+
+def high():
+    return localcontext(HIGH)
+
+
+def fast():
+    return localcontext(FAST)
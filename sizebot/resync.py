@@ -0,0 +1,106 @@
+import asyncio
+import os
+from pathlib import Path
+
+import discord
+
+import sizebot.digilogger as logger
+from sizebot.globalsb import folder, store, blockingio, canNick, applyNick
+from sizebot.nickqueue import retryAfter
+
+
+class Resync:
+    """Sets every registered member of a guild's sizetag from their record, for after an outage or a bulk import.
+
+    Members whose nickname is already right are skipped. Up to `concurrency` edits run at once, and when
+    Discord rate limits us the worker waits out the retry-after and tries the same member again.
+    Finished members are checkpointed to disk, so an interrupted resync picks up where it left off."""
+
+    def __init__(self, guild, concurrency=2, checkpointevery=25):
+        self.guild = guild
+        self.concurrency = concurrency
+        self.checkpointevery = checkpointevery
+        self.checkpoint = Path(folder) / f"resync-{guild.id}.txt"
+        self.done = set()
+        self.total = 0
+        self.resumed = 0
+        self.edited = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    async def run(self, report=None, fresh=False):
+        """Resync the whole guild. report is awaited with this job every checkpointevery members."""
+        if fresh:
+            await store.run(removeCheckpoint, self.checkpoint)
+        self.done = await store.run(loadCheckpoint, self.checkpoint)
+        members = [m for m in self.guild.members if canNick(m)]
+        todo = [m for m in members if str(m.id) not in self.done]
+        self.total = len(members)
+        self.resumed = self.total - len(todo)
+        # Workers take from the end.
+        todo.reverse()
+
+        async def worker():
+            while todo:
+                await self._resync(todo.pop())
+                if len(self.done) % self.checkpointevery == 0:
+                    await store.run(saveCheckpoint, self.checkpoint, sorted(self.done))
+                    if report is not None:
+                        await report(self)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        await store.run(removeCheckpoint, self.checkpoint)
+        logger.msg(f"Resync of guild {self.guild.id} finished. {self}")
+
+    async def _resync(self, member):
+        while True:
+            try:
+                edited = await applyNick(member)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    delay = retryAfter(e, 5.0)
+                    logger.warn(f"Rate limited resyncing guild {self.guild.id}, retrying in {delay:.1f}s.")
+                    await asyncio.sleep(delay)
+                    continue
+                logger.crit(f"Resync of {member.id} failed: {e}")
+                self.failed += 1
+            except Exception as e:
+                logger.crit(f"Resync of {member.id} failed: {e!r}")
+                self.failed += 1
+            else:
+                if edited:
+                    self.edited += 1
+                else:
+                    self.unchanged += 1
+            break
+        self.done.add(str(member.id))
+
+    def __str__(self):
+        return (f"{len(self.done)}/{self.total} members resynced ({self.resumed} from an earlier run): "
+                f"{self.edited} edited, {self.unchanged} already right, {self.failed} failed.")
+
+
+@blockingio
+def loadCheckpoint(path):
+    try:
+        with open(path) as f:
+            return set(f.read().split())
+    except FileNotFoundError:
+        return set()
+
+
+@blockingio
+def saveCheckpoint(path, userids):
+    # Swap in a complete file, so an interruption mid-write doesn't lose the old checkpoint.
+    tempfile = path.with_suffix(".tmp")
+    with open(tempfile, "w") as f:
+        f.writelines(userid + "\n" for userid in userids)
+    os.replace(tempfile, path)
+
+
+@blockingio
+def removeCheckpoint(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -1,19 +1,79 @@
+import ast
+import math
+import operator
 import sys
 import random
 import re
-
-import numexpr
+from functools import lru_cache
 
 
 class RollException(Exception):
     pass
 
 
-def evalmath(expression):
-    try:
-        return int(numexpr.evaluate(expression, local_dict={}, global_dict={}))
-    except Exception:
+# The only arithmetic a roll can do.
+binaryops = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow
+}
+unaryops = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg
+}
+
+# Biggest power (in bits) a roll can raise to, so 9**9**9 can't hang the bot.
+maxpowbits = 4096
+
+
+def power(base, exponent):
+    if abs(base) > 1 and exponent * math.log2(abs(base)) > maxpowbits:
         raise RollException
+    return base ** exponent
+
+
+def checkmath(node, dicenames):
+    """Raise RollException unless node is only numbers, dice and arithmetic."""
+    if isinstance(node, ast.Expression):
+        checkmath(node.body, dicenames)
+    elif isinstance(node, ast.BinOp) and type(node.op) in binaryops:
+        checkmath(node.left, dicenames)
+        checkmath(node.right, dicenames)
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in unaryops:
+        checkmath(node.operand, dicenames)
+    elif isinstance(node, ast.Name) and node.id in dicenames:
+        pass
+    elif isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise RollException
+    # Python 3.7 parses numbers as ast.Num.
+    elif isinstance(node, getattr(ast, "Num", ())):
+        pass
+    else:
+        raise RollException
+
+
+def evalmath(node, dice):
+    """Work out a checked expression, with dice mapping each dice name to what it rolled."""
+    if isinstance(node, ast.Expression):
+        return evalmath(node.body, dice)
+    if isinstance(node, ast.BinOp):
+        left = evalmath(node.left, dice)
+        right = evalmath(node.right, dice)
+        if isinstance(node.op, ast.Pow):
+            return power(left, right)
+        return binaryops[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp):
+        return unaryops[type(node.op)](evalmath(node.operand, dice))
+    if isinstance(node, ast.Name):
+        return dice[node.id]
+    if isinstance(node, ast.Constant):
+        return node.value
+    return node.n
 
 
 class RollArg:
@@ -89,20 +149,50 @@ class Result:
         return output
 
 
-def roll(argstring):
-    # Split up and categorize parameters
+class RollTemplate:
+    """A parsed roll: the dice to roll, and the arithmetic to do with them."""
+    __slots__ = ["rollargs", "tree"]
+
+    def __init__(self, rollargs, tree):
+        self.rollargs = rollargs
+        self.tree = tree
+
+
+# Rolling the same thing again skips straight to the dice.
+@lru_cache(maxsize=256)
+def parseRoll(argstring):
+    # Swap each dice term for a name, _0, _1 and so on, and parse what's left as Python arithmetic.
     argstrings = RollArg.re_pattern_all.split(argstring)
-    rolls = []
-    rollexpr = ""
-    for s in argstrings:
-        rollarg = RollArg.parse(s)
-        if rollarg is not None:
-            result = rollarg.roll()
-            rolls.append(result)
-            s = result.total
-        rollexpr += str(s)
-
-    total = evalmath(rollexpr)
+    rollargs = []
+    expr = ""
+    for i, s in enumerate(argstrings):
+        # Odd pieces are what the pattern matched.
+        if i % 2:
+            rollarg = RollArg.parse(s)
+            if rollarg.sides < 1:
+                raise RollException
+            s = f"_{len(rollargs)}"
+            rollargs.append(rollarg)
+        expr += s
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+        checkmath(tree, {f"_{n}" for n in range(len(rollargs))})
+    except (SyntaxError, RecursionError, MemoryError):
+        # Nested too deeply to parse or walk, like a few thousand minus signs in a row.
+        raise RollException
+    return RollTemplate(tuple(rollargs), tree)
+
+
+def roll(argstring):
+    template = parseRoll(argstring)
+    rolls = [rollarg.roll() for rollarg in template.rollargs]
+    dice = {f"_{n}": result.total for n, result in enumerate(rolls)}
+
+    try:
+        total = int(evalmath(template.tree, dice))
+    except (ArithmeticError, ValueError, TypeError, RecursionError):
+        # Dividing by zero, overflowing a float, ending up with inf or nan, a complex number, or nested too deeply.
+        raise RollException
 
     return Result(total, rolls)
 
@@ -0,0 +1,125 @@
+import asyncio
+import heapq
+import itertools
+
+import sizebot.digilogger as logger
+
+
+class Job:
+    """Something a Scheduler runs every `interval` seconds. Subclasses add their own state, in __slots__."""
+    __slots__ = ["key", "interval", "due", "serial"]
+
+    def __init__(self, key, interval):
+        self.key = key
+        self.interval = interval
+        self.due = None  # event loop time it next runs at, set by the scheduler
+        self.serial = None  # tells this job's heap entries apart from a replaced job's
+
+
+class Scheduler:
+    """Runs any number of repeating jobs from a single task, using a heap of when each is next due.
+
+    Jobs due within `batchwindow` seconds of each other are handed to fire(jobs) together.
+    There's one job per key; adding a job replaces any other with the same key."""
+
+    def __init__(self, fire, batchwindow=0.5):
+        self._fire = fire
+        self.batchwindow = batchwindow
+        self.fired = 0
+        self.batches = 0
+        self._heap = []  # (due, serial, key), including stale entries for removed jobs
+        self._jobs = {}  # key -> job
+        self._serials = itertools.count()
+        self._wakeup = None
+        self._task = None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, key):
+        return key in self._jobs
+
+    def get(self, key):
+        return self._jobs.get(key)
+
+    def upcoming(self):
+        """Every job, soonest first."""
+        return sorted(self._jobs.values(), key=lambda job: job.due)
+
+    def add(self, job, delay=0):
+        """Schedule job to first run in delay seconds, replacing the job with the same key. Returns the replaced job."""
+        loop = asyncio.get_event_loop()
+        old = self._jobs.get(job.key)
+        job.due = loop.time() + delay
+        job.serial = next(self._serials)
+        self._jobs[job.key] = job
+        self._push(job)
+        self._start()
+        return old
+
+    def remove(self, key):
+        """Stop a job. Returns it, or None if there wasn't one."""
+        # Its heap entry is skipped when it comes up.
+        return self._jobs.pop(key, None)
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.due, job.serial, job.key))
+        # Clear out removed jobs' entries once they're most of the heap.
+        if len(self._heap) > 2 * len(self._jobs) + 64:
+            self._heap = [(job.due, job.serial, job.key) for job in self._jobs.values()]
+            heapq.heapify(self._heap)
+        if self._wakeup is not None and self._heap[0][1] == job.serial:
+            # Due before whatever the scheduler is waiting on.
+            self._wakeup.set()
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    def _popDue(self, now):
+        batch = []
+        while self._heap and self._heap[0][0] <= now + self.batchwindow:
+            due, serial, key = heapq.heappop(self._heap)
+            job = self._jobs.get(key)
+            if job is not None and job.serial == serial:
+                batch.append(job)
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            wait = self._heap[0][0] - loop.time()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = loop.time()
+            batch = self._popDue(now)
+            if not batch:
+                continue
+            self.batches += 1
+            self.fired += len(batch)
+            try:
+                await self._fire(batch)
+            except Exception as e:
+                logger.crit(f"Scheduled jobs failed: {e!r}")
+
+            now = loop.time()
+            for job in batch:
+                # Stopped or replaced while it ran.
+                if self._jobs.get(job.key) is not job:
+                    continue
+                # Don't try to catch up on runs we were too slow for.
+                job.due = max(job.due + job.interval, now)
+                self._push(job)
+
+    def __str__(self):
+        return f"{len(self._jobs)} jobs scheduled, {self.fired} runs in {self.batches} batches"
@@ -0,0 +1,99 @@
+import threading
+from bisect import bisect_left, bisect_right
+from decimal import localcontext
+
+from sizebot.precision import FAST
+
+
+def logSize(value):
+    """log10 of a size, as a float, for indexes that compare sizes on a log scale."""
+    if value <= 0:
+        return float("-inf")
+    with localcontext(FAST):
+        return float(value.log10())
+
+
+def distance(a, b):
+    # Equal infinities are no distance apart, rather than NaN.
+    if a == b:
+        return 0
+    return abs(a - b)
+
+
+class SizeIndex:
+    """User IDs kept sorted by a size (current height, say), and kept up to date as users change.
+
+    Updates are a binary search plus a list insert; queries never touch the user store."""
+
+    def __init__(self):
+        self._entries = []  # sorted (value, userid)
+        self._keys = []  # just the values, in the same order, for counting by value
+        self._values = {}  # userid -> value
+        # Updated from the store's worker threads, read from the event loop.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, userid):
+        return str(userid) in self._values
+
+    def get(self, userid):
+        return self._values.get(str(userid))
+
+    def update(self, userid, value):
+        userid = str(userid)
+        with self._lock:
+            self._remove(userid)
+            i = bisect_left(self._entries, (value, userid))
+            self._entries.insert(i, (value, userid))
+            self._keys.insert(i, value)
+            self._values[userid] = value
+
+    def remove(self, userid):
+        with self._lock:
+            self._remove(str(userid))
+
+    def _remove(self, userid):
+        old = self._values.pop(userid, None)
+        if old is not None:
+            i = bisect_left(self._entries, (old, userid))
+            del self._entries[i]
+            del self._keys[i]
+
+    def rank(self, value):
+        """(how many are smaller, how many are bigger, how many in total), compared to value."""
+        with self._lock:
+            return bisect_left(self._keys, value), len(self._keys) - bisect_right(self._keys, value), len(self._keys)
+
+    def nearest(self, value, k, exclude=None):
+        """The k (userid, value) closest to value, closest first, skipping the exclude userid.
+
+        Walks outwards from where value would go, so it only looks at about k entries."""
+        exclude = None if exclude is None else str(exclude)
+        found = []
+        with self._lock:
+            hi = bisect_left(self._keys, value)
+            lo = hi - 1
+            while len(found) < k and (lo >= 0 or hi < len(self._keys)):
+                if hi >= len(self._keys) or (lo >= 0 and distance(self._keys[lo], value) <= distance(self._keys[hi], value)):
+                    nearvalue, userid = self._entries[lo]
+                    lo -= 1
+                else:
+                    nearvalue, userid = self._entries[hi]
+                    hi += 1
+                if userid != exclude:
+                    found.append((userid, nearvalue))
+        return found
+
+    def largest(self, n):
+        """The n biggest (userid, value), biggest first."""
+        if n <= 0:
+            return []
+        with self._lock:
+            return [(userid, value) for value, userid in reversed(self._entries[-n:])]
+
+    def smallest(self, n):
+        """The n smallest (userid, value), smallest first."""
+        with self._lock:
+            return [(userid, value) for value, userid in self._entries[:max(n, 0)]]
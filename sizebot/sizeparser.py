@@ -0,0 +1,64 @@
+import re
+from decimal import Decimal, InvalidOperation, Overflow
+
+from sizebot.units import lengths, weights
+
+# A number, with optional thousands separators, decimals and exponent: 5, 1,000, 5.5, .5, 1e6, 2.5E-3
+number = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d*)?(?:e[+-]?\d+)?|\.\d+(?:e[+-]?\d+)?"
+
+# Everything is matched in one pass: either feet and inches (5'3", 5ft 3in, 5 feet 3 inches), or a number and a unit.
+sizeregex = re.compile(
+    rf"""\s*(?:
+        (?P<feet>{number})\s*(?:feet|foot|ft|')\s*(?P<inch>{number})\s*(?:inches|inch|in|")?
+        |
+        (?P<value>{number})\s*(?P<unit>[^\d\s.,+-]\S*)?
+    )\s*""",
+    re.IGNORECASE | re.VERBOSE)
+
+
+class SizeParseError(Exception):
+    """A size string that couldn't be parsed. reason says why, text is what was given."""
+
+    def __init__(self, text, reason):
+        self.text = text
+        self.reason = reason
+        super().__init__(f"{reason}: {text!r}")
+
+
+def toDecimal(s):
+    return Decimal(s.replace(",", ""))
+
+
+def parseSize(text):
+    """Split a size string into (value, unit). unit is None if none was given.
+
+    Feet and inches are added up into inches."""
+    match = sizeregex.fullmatch(text)
+    if match is None:
+        raise SizeParseError(text, "Not a size")
+    if match.group("feet") is not None:
+        return toDecimal(match.group("feet")) * 12 + toDecimal(match.group("inch")), "in"
+    return toDecimal(match.group("value")), match.group("unit")
+
+
+def parseWithUnits(text, registry):
+    try:
+        value, unit = parseSize(text)
+        if unit is None:
+            raise SizeParseError(text, "Missing unit")
+        converted = registry.convert(value, unit)
+    except (Overflow, InvalidOperation):
+        raise SizeParseError(text, "Too big")
+    if converted is None:
+        raise SizeParseError(text, f"Unknown unit {unit!r}")
+    return converted
+
+
+def parseHeight(text):
+    """Parse a height string into micrometers."""
+    return parseWithUnits(text, lengths)
+
+
+def parseWeight(text):
+    """Parse a weight string into milligrams."""
+    return parseWithUnits(text, weights)
@@ -0,0 +1,79 @@
+import math
+from decimal import Decimal, Overflow, localcontext
+
+from sizebot.precision import FAST
+
+# What a slow change can do at each step.
+kinds = ["add", "multiply", "divide"]
+
+
+class SlowChangeState:
+    """A slow change as a function of time, so a user's height can be worked out whenever it's read.
+
+    startheight is their height before the step at starttime (a time.time()), and another step is taken every
+    period seconds after that. kind is "add", "multiply" or "divide". Never changed once made, since worker threads read it;
+    rebase makes a new one."""
+    __slots__ = ["startheight", "kind", "amount", "period", "starttime"]
+
+    def __init__(self, startheight, kind, amount, period, starttime):
+        self.startheight = startheight
+        self.kind = kind
+        self.amount = amount
+        self.period = period
+        self.starttime = starttime
+
+    def steps(self, now):
+        """How many steps have been taken by now."""
+        if now < self.starttime:
+            return 0
+        return math.floor((now - self.starttime) / self.period) + 1
+
+    def heightAt(self, now, limit):
+        """Their height at time now, no bigger than limit."""
+        steps = self.steps(now)
+        if steps == 0:
+            return self.startheight
+        # Worked out at a fixed precision, since this runs on the store's worker threads too.
+        with localcontext(FAST):
+            try:
+                if self.kind == "add":
+                    height = self.startheight + self.amount * steps
+                elif self.kind == "multiply":
+                    height = self.startheight * self.amount ** steps
+                else:
+                    # As a multiply, so a divisor too big to raise to this many steps underflows to 0 rather than
+                    # overflowing like a height would.
+                    height = self.startheight * (1 / self.amount) ** steps
+            except Overflow:
+                return limit
+        return min(height, limit)
+
+    def rebase(self, height, now):
+        """The same slow change, carrying on from height, which already includes every step taken by now."""
+        starttime = self.starttime + self.steps(now) * self.period
+        return SlowChangeState(height, self.kind, self.amount, self.period, starttime)
+
+    def nextStep(self, now):
+        """When the next step after now is taken."""
+        return self.starttime + self.steps(now) * self.period
+
+    def toSpec(self):
+        return {
+            "startheight": str(self.startheight),
+            "kind": self.kind,
+            "amount": str(self.amount),
+            "period": self.period,
+            "starttime": self.starttime
+        }
+
+    @classmethod
+    def fromSpec(cls, spec):
+        """The state saved by toSpec. Raises ValueError if it isn't one SizeBot could have made."""
+        state = cls(Decimal(spec["startheight"]), spec["kind"], Decimal(spec["amount"]), spec["period"], spec["starttime"])
+        if state.kind not in kinds or not (state.startheight.is_finite() and state.amount.is_finite()) or state.period <= 0:
+            raise ValueError(f"Invalid slow change {state!r}")
+        return state
+
+    def __repr__(self):
+        return (f"SlowChangeState({self.startheight!r}, {self.kind!r}, {self.amount!r}, "
+                f"{self.period!r}, {self.starttime!r})")
@@ -0,0 +1,438 @@
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import sizebot.digilogger as logger
+
+# A user record is stored as a list of fields, in the same order as the lines of a user file.
+FIELDS = ["nick", "display", "height", "baseheight", "baseweight", "density", "units", "species"]
+
+
+class UserStore:
+    """Storage backend for user records.
+
+    Records are lists of strings, one per field (see FIELDS), without newlines."""
+
+    def exists(self, userid):
+        raise NotImplementedError
+
+    def read(self, userid):
+        raise NotImplementedError
+
+    def write(self, userid, fields):
+        raise NotImplementedError
+
+    def delete(self, userid):
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def ids(self):
+        raise NotImplementedError
+
+    def stamp(self, userid):
+        """A value that changes whenever the record is changed by someone else."""
+        raise NotImplementedError
+
+    def records(self):
+        """Every (userid, fields), for building indexes at startup."""
+        for userid in self.ids():
+            yield userid, self.read(userid)
+
+    def close(self):
+        pass
+
+
+class TextUserStore(UserStore):
+    """One text file per user, one field per line."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def userfile(self, userid):
+        return self.path / f"{userid}.txt"
+
+    def exists(self, userid):
+        return self.userfile(userid).exists()
+
+    def read(self, userid):
+        with open(self.userfile(userid)) as f:
+            return f.read().splitlines()
+
+    def write(self, userid, fields):
+        # Write to a temporary file and swap it in, so a crash can't leave a half-written user.
+        userfile = self.userfile(userid)
+        tempfile = userfile.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tempfile, "w") as f:
+            f.writelines(field + "\n" for field in fields)
+        os.replace(tempfile, userfile)
+
+    def delete(self, userid):
+        try:
+            os.remove(self.userfile(userid))
+        except FileNotFoundError:
+            # Never flushed, or already gone.
+            pass
+
+    def count(self):
+        return sum(1 for _ in self.ids())
+
+    def ids(self):
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt"):
+                    yield entry.name[:-4]
+
+    def stamp(self, userid):
+        try:
+            return os.stat(self.userfile(userid)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+class SQLiteUserStore(UserStore):
+    """All users in a single SQLite table."""
+
+    # Statements are kept constant so sqlite3 reuses its prepared copies.
+    SQL_CREATE = ("CREATE TABLE IF NOT EXISTS users ("
+                  "id INTEGER PRIMARY KEY, "
+                  + ", ".join(f"{f} TEXT NOT NULL" for f in FIELDS)
+                  + ")")
+    SQL_EXISTS = "SELECT 1 FROM users WHERE id = ?"
+    SQL_READ = f"SELECT {', '.join(FIELDS)} FROM users WHERE id = ?"
+    SQL_WRITE = f"INSERT OR REPLACE INTO users (id, {', '.join(FIELDS)}) VALUES (?{', ?' * len(FIELDS)})"
+    SQL_DELETE = "DELETE FROM users WHERE id = ?"
+    SQL_COUNT = "SELECT COUNT(*) FROM users"
+    SQL_IDS = "SELECT id FROM users"
+    SQL_RECORDS = f"SELECT id, {', '.join(FIELDS)} FROM users"
+
+    def __init__(self, path):
+        self.path = path
+        # The connection is shared with the AsyncUserStore's worker threads.
+        self.conn = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(self.SQL_CREATE)
+
+    def exists(self, userid):
+        with self.lock:
+            return self.conn.execute(self.SQL_EXISTS, (int(userid),)).fetchone() is not None
+
+    def read(self, userid):
+        with self.lock:
+            row = self.conn.execute(self.SQL_READ, (int(userid),)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"User {userid} not found in {self.path}")
+        return list(row)
+
+    def write(self, userid, fields):
+        with self.lock:
+            self.conn.execute(self.SQL_WRITE, (int(userid), *fields))
+
+    def writemany(self, records):
+        """Write an iterable of (userid, fields) in a single transaction."""
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(self.SQL_WRITE, ((int(userid), *fields) for userid, fields in records))
+
+    def delete(self, userid):
+        with self.lock:
+            self.conn.execute(self.SQL_DELETE, (int(userid),))
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute(self.SQL_COUNT).fetchone()[0]
+
+    def ids(self):
+        with self.lock:
+            rows = self.conn.execute(self.SQL_IDS).fetchall()
+        for (userid,) in rows:
+            yield str(userid)
+
+    def records(self):
+        with self.lock:
+            rows = self.conn.execute(self.SQL_RECORDS).fetchall()
+        for userid, *fields in rows:
+            yield str(userid), fields
+
+    def stamp(self, userid):
+        # Changes whenever another connection commits to the database.
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class JobStore:
+    """Storage for scheduled jobs (slow changes, repeats), so they carry on after a restart.
+
+    Each job is a JSON-friendly dict (its spec), by key."""
+
+    def all(self):
+        """A copy of every (key, spec)."""
+        raise NotImplementedError
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def put(self, key, spec):
+        raise NotImplementedError
+
+    def update(self, key, **fields):
+        """Change some fields of a job's spec, if it's still there."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+
+class FileJobStore(JobStore):
+    """Every job in one JSON file. Changes within `window` seconds of each other are saved together."""
+
+    def __init__(self, path, window=5.0):
+        self.path = Path(path)
+        self.window = window
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._timer = None
+        try:
+            with open(self.path) as f:
+                self._jobs = json.load(f)
+        except FileNotFoundError:
+            self._jobs = {}
+
+    def all(self):
+        with self._lock:
+            return [(key, dict(spec)) for key, spec in self._jobs.items()]
+
+    def get(self, key):
+        with self._lock:
+            spec = self._jobs.get(key)
+        return None if spec is None else dict(spec)
+
+    def put(self, key, spec):
+        with self._lock:
+            self._jobs[key] = dict(spec)
+            self._changed()
+
+    def update(self, key, **fields):
+        with self._lock:
+            spec = self._jobs.get(key)
+            if spec is None:
+                return
+            spec.update(fields)
+            self._changed()
+
+    def delete(self, key):
+        with self._lock:
+            if self._jobs.pop(key, None) is not None:
+                self._changed()
+
+    def _changed(self):
+        # Called with the lock held.
+        if self._timer is None:
+            self._timer = threading.Timer(self.window, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is None:
+                return
+            self._timer.cancel()
+            self._timer = None
+            # Swap in a complete file, so a crash can't leave a half-written one.
+            tempfile = self.path.with_suffix(".tmp")
+            with open(tempfile, "w") as f:
+                json.dump(self._jobs, f, indent=1)
+            os.replace(tempfile, self.path)
+            self.saves += 1
+
+
+def openJobStore(folder):
+    return FileJobStore(Path(folder) / "jobs.json")
+
+
+def openStore(folder):
+    """Use the SQLite database if it's been created (see sizebot.migrate), otherwise the user files."""
+    dbpath = Path(folder) / "users.db"
+    if dbpath.exists():
+        return SQLiteUserStore(dbpath)
+    return TextUserStore(Path(folder) / "users")
+
+
+class IOStats:
+    """Time spent in blocking I/O, split by whether it ran on the event loop's thread or not."""
+
+    def __init__(self):
+        self.onloop = 0.0
+        self.offloop = 0.0
+        self.onloopcalls = 0
+        self.offloopcalls = 0
+
+    def record(self, elapsed):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.offloop += elapsed
+            self.offloopcalls += 1
+        else:
+            self.onloop += elapsed
+            self.onloopcalls += 1
+
+    def reset(self):
+        self.__init__()
+
+    def __str__(self):
+        return (f"Blocked the event loop for {self.onloop * 1000:.3f}ms over {self.onloopcalls} calls, "
+                f"{self.offloop * 1000:.3f}ms over {self.offloopcalls} calls ran in worker threads.")
+
+
+iostats = IOStats()
+
+
+def blockingio(fn):
+    """Decorator that records how long each call takes in iostats."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            iostats.record(time.perf_counter() - start)
+    return wrapper
+
+
+class AsyncUserStore:
+    """Awaitable access to user records.
+
+    The blocking reads and writes run on a bounded thread pool, so a slow disk doesn't stall the event loop."""
+
+    def __init__(self, get, put, delete, maxworkers=4):
+        self._get = get
+        self._put = put
+        self._delete = delete
+        self.executor = ThreadPoolExecutor(max_workers=maxworkers, thread_name_prefix="userstore")
+        self._locks = defaultdict(asyncio.Lock)
+
+    def lock(self, userid):
+        """Hold this across a get, change and put of one user, so another command can't slip in between and lose an update.
+
+        `async with store.lock(id): ...`"""
+        return self._locks[str(userid)]
+
+    async def run(self, fn, *args):
+        """Run any other blocking function on the store's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
+
+    async def get(self, userid):
+        return await self.run(self._get, userid)
+
+    async def put(self, userid, record):
+        return await self.run(self._put, userid, record)
+
+    async def delete(self, userid):
+        return await self.run(self._delete, userid)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class WriteBehind:
+    """Holds user writes for up to `window` seconds, so repeated writes to the same user become one durable write."""
+
+    def __init__(self, write, window=5.0):
+        self._write = write
+        self.window = window
+        self.pending = {}
+        self.puts = 0
+        self.writes = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._flushlock = threading.Lock()
+        self._timer = None
+
+    def put(self, userid, record):
+        userid = str(userid)
+        with self._lock:
+            self.pending[userid] = record.copy()
+            self.puts += 1
+            if self.window <= 0:
+                flushnow = True
+            else:
+                flushnow = False
+                self._arm()
+        if flushnow:
+            self.flush()
+
+    def _arm(self, delay=None):
+        # Called with the lock held.
+        if self._timer is None:
+            self._timer = threading.Timer(self.window if delay is None else delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def __contains__(self, userid):
+        return str(userid) in self.pending
+
+    def get(self, userid):
+        """The record waiting to be written for this user, if any."""
+        with self._lock:
+            record = self.pending.get(str(userid))
+        return None if record is None else record.copy()
+
+    def delete(self, userid, delete):
+        """Drop any write waiting for this user and call delete(userid), with no flush writing at the same time.
+
+        Otherwise a flush that was already writing their record could bring it back after it's deleted."""
+        userid = str(userid)
+        with self._flushlock:
+            with self._lock:
+                self.pending.pop(userid, None)
+            delete(userid)
+
+    def flush(self):
+        """Write everything that's pending, right now.
+
+        A record that fails to write goes back in pending (unless a newer one came in) and is tried again later."""
+        with self._flushlock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self.pending = self.pending, {}
+            failed = {}
+            for userid, record in pending.items():
+                try:
+                    self._write(userid, record)
+                except Exception as e:
+                    # Often run from the timer's thread, where nobody else would see this.
+                    logger.crit(f"Couldn't save user {userid}, will try again: {e!r}")
+                    failed[userid] = record
+                    self.failures += 1
+                    continue
+                self.writes += 1
+            if failed:
+                with self._lock:
+                    for userid, record in failed.items():
+                        if userid not in self.pending:
+                            self.pending[userid] = record
+                    if self.pending:
+                        self._arm(max(self.window, 1))
+
+    def __str__(self):
+        return f"{self.puts} writes requested, {self.writes} written to storage, {self.failures} failed, {len(self.pending)} pending."
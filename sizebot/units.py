@@ -0,0 +1,289 @@
+from bisect import bisect_right
+from decimal import Decimal
+
+# Unit constants.
+# Height [micrometers]
+inch = Decimal("25400")
+foot = inch * Decimal("12")
+mile = foot * Decimal("5280")
+ly = mile * Decimal("5879000000000")
+au = Decimal("149597870700000000")
+uni = Decimal("879848000000000000000000000000000")
+infinity = Decimal("879848000000000000000000000000000000000000000000000000000000")
+# Weight [milligrams]
+ounce = Decimal("28350")
+pound = ounce * Decimal("16")
+uston = pound * Decimal("2000")
+earth = Decimal("5972198600000000000000000000000")
+sun = Decimal("1988435000000000000000000000000000000")
+milkyway = Decimal("95000000000000000000000000000000000000000000000")
+uniw = Decimal("3400000000000000000000000000000000000000000000000000000000000")
+
+
+class Unit:
+    __slots__ = ["factor", "symbols", "names", "label", "system"]
+
+    def __init__(self, factor, symbols, names, label, system):
+        self.factor = factor
+        self.symbols = symbols
+        self.names = names
+        self.label = label
+        self.system = system
+
+    def __repr__(self):
+        return f"Unit({self.label!r}, {self.factor})"
+
+
+class UnitRegistry:
+    """Units that a size can be given in, looked up by symbol (case-sensitive) or name (case-insensitive)"""
+
+    def __init__(self):
+        self.units = []
+        self._symbols = {}
+        self._names = {}
+
+    def add(self, factor, symbols=(), names=(), label=None, system="metric"):
+        if label is None:
+            label = f"{symbols[0]} ({names[0]}[s])"
+        unit = Unit(Decimal(factor), symbols, names, label, system)
+        self.units.append(unit)
+        for symbol in symbols:
+            self._symbols[symbol] = unit
+        for name in names:
+            self._names[name.lower()] = unit
+        return unit
+
+    def alias(self, symbol, existing):
+        """Accept another symbol for a unit, without listing it in the table"""
+        self._symbols[symbol] = self._symbols[existing]
+
+    def get(self, unit):
+        found = self._symbols.get(unit)
+        if found is None:
+            found = self._names.get(unit.lower())
+        return found
+
+    def __contains__(self, unit):
+        return self.get(unit) is not None
+
+    def convert(self, value, unit):
+        """Convert value in unit to base units, or None if the unit isn't known"""
+        if value is None or unit is None:
+            return None
+        found = self.get(unit)
+        if found is None:
+            return None
+        return Decimal(value) * found.factor
+
+    def table(self):
+        """Box-drawn table of accepted units, metric on the left and imperial on the right"""
+        left = [u.label for u in self.units if u.system == "metric"]
+        right = [u.label for u in self.units if u.system == "imperial"]
+        leftwidth = max(len(s) for s in left + ["Metric"]) + 2
+        rightwidth = max(len(s) for s in right + ["Imperial"]) + 2
+        rows = [
+            f"┌{'─' * leftwidth}┬{'─' * rightwidth}┐",
+            f"│{'Metric'.center(leftwidth)}│{'Imperial'.center(rightwidth)}│",
+            f"├{'─' * leftwidth}┼{'─' * rightwidth}┤"
+        ]
+        for i in range(max(len(left), len(right))):
+            leftlabel = left[i] if i < len(left) else ""
+            rightlabel = right[i] if i < len(right) else ""
+            rows.append(f"│ {leftlabel.ljust(leftwidth - 1)}│ {rightlabel.ljust(rightwidth - 1)}│")
+        rows.append(f"└{'─' * leftwidth}┴{'─' * rightwidth}┘")
+        return "\n".join(rows)
+
+
+def addSI(registry, base, basesymbol, basename, prefixes):
+    for exp, symbol, name in prefixes:
+        factor = base * Decimal(f"1E{exp}")
+        registry.add(factor, (symbol + basesymbol,), (name + basename, name + basename + "s"))
+
+
+siprefixes = [
+    (-24, "y", "yocto"),
+    (-21, "z", "zepto"),
+    (-18, "a", "atto"),
+    (-15, "f", "femto"),
+    (-12, "p", "pico"),
+    (-9, "n", "nano"),
+    (-6, "µ", "micro"),
+    (-3, "m", "milli"),
+    (-2, "c", "centi"),
+    (0, "", ""),
+    (3, "k", "kilo"),
+    (6, "M", "mega"),
+    (9, "G", "giga"),
+    (12, "T", "tera"),
+    (15, "P", "peta"),
+    (18, "E", "exa"),
+    (21, "Z", "zetta"),
+    (24, "Y", "yotta")
+]
+
+universeprefixes = [
+    (0, "", ""),
+    (3, "k", "kilo"),
+    (6, "M", "mega"),
+    (9, "G", "giga"),
+    (12, "T", "tera"),
+    (15, "P", "peta"),
+    (18, "E", "exa"),
+    (21, "Z", "zetta"),
+    (24, "Y", "yotta")
+]
+
+# Heights, in micrometers.
+lengths = UnitRegistry()
+addSI(lengths, Decimal("1E6"), "m", "meter", siprefixes)
+lengths.alias("um", "µm")
+addSI(lengths, uni, "uni", "universe", universeprefixes)
+lengths.add(inch, (), ("in", "\"", "inch", "inches"), "in (inch[es])", "imperial")
+lengths.add(foot, (), ("ft", "'", "foot", "feet"), "ft (feet)", "imperial")
+lengths.add(mile, (), ("mi", "mile", "miles"), "mi (mile[s])", "imperial")
+lengths.add(au, ("AU",), ("astronomical_unit", "astronomical_units"), "AU (astronomical_unit[s])", "imperial")
+lengths.add(ly, ("ly",), ("lightyear", "lightyears"), "ly (lightyear[s])", "imperial")
+
+# Weights, in milligrams.
+weights = UnitRegistry()
+addSI(weights, Decimal("1E3"), "g", "gram", [p for p in siprefixes if p[0] < 6 and p[0] != -2])
+weights.alias("ug", "µg")
+weights.add(Decimal("1E9"), ("t",), ("megagram", "megagrams", "ton", "tons", "tonne", "tonnes"), "t (ton[s])")
+weights.add(Decimal("1E12"), ("Gg", "kt"), ("gigagram", "gigagrams", "kiloton", "kilotons", "kilotonne", "kilotonnes"), "kt (kiloton[s])")
+weights.add(Decimal("1E15"), ("Tg", "Mt"), ("teragram", "teragrams", "megaton", "megatons", "megatonne", "megatonnes"), "Mt (megaton[s])")
+weights.add(Decimal("1E18"), ("Pg", "Gt"), ("petagram", "petagrams", "gigaton", "gigatons", "gigatonne", "gigatonnes"), "Gt (gigaton[s])")
+weights.add(Decimal("1E21"), ("Eg", "Tt"), ("exagram", "exagrams", "teraton", "teratons", "teratonne", "teratonnes"), "Tt (teraton[s])")
+weights.add(Decimal("1E24"), ("Zg", "Pt"), ("zettagram", "zettagrams", "petaton", "petatons", "petatonne", "petatonnes"), "Pt (petaton[s])")
+weights.add(Decimal("1E27"), ("Yg", "Et"), ("yottagram", "yottagrams", "exaton", "exatons", "exatonne", "exatonnes"), "Et (exaton[s])")
+weights.add(Decimal("1E30"), ("Zt",), ("zettaton", "zettatons", "zettatonne", "zettatonnes"), "Zt (zettaton[s])")
+weights.add(Decimal("1E33"), ("Yt",), ("yottaton", "yottatons", "yottatonne", "yottatonnes"), "Yt (yottaton[s])")
+addSI(weights, uniw, "uni", "universe", universeprefixes)
+weights.add(ounce, ("oz",), ("ounce", "ounces"), "oz (ounce[s])", "imperial")
+weights.add(pound, ("lb", "lbs"), ("pound", "pounds"), "lbs (pound[s])", "imperial")
+weights.add(earth, (), ("earth", "earths"), "Earth[s]", "imperial")
+weights.add(sun, (), ("sun", "suns"), "Sun[s]", "imperial")
+
+
+# Remove trailing zeroes from a Decimal
+def trimzeroes(d):
+    return d.normalize() + 0
+
+
+class ScaleTable:
+    """Picks the unit to show a value in, by binary search over the upper bound of each unit's range.
+
+    scales is a sorted list of (below, scale, unit): values under `below` are shown as value / scale in unit.
+    unit can instead be a function(value, accuracy) that formats the value itself."""
+
+    def __init__(self, scales):
+        self.thresholds = [Decimal(below) for below, scale, unit in scales]
+        if self.thresholds != sorted(self.thresholds):
+            raise ValueError("Scale thresholds must be in increasing order.")
+        self.scales = [(Decimal(scale), unit) for below, scale, unit in scales]
+
+    def find(self, value):
+        """The (scale, unit) to show value in, or None if it's too big for every unit"""
+        i = bisect_right(self.thresholds, value)
+        if i == len(self.scales):
+            return None
+        return self.scales[i]
+
+    def format(self, value, accuracy):
+        found = self.find(value)
+        if found is None:
+            return "∞"
+        scale, unit = found
+        if callable(unit):
+            return unit(value, accuracy)
+        return f"{trimzeroes(round(value / scale, accuracy)):,}{unit}"
+
+
+def formatFeetAndInches(value, accuracy):
+    inchval = value / inch                  # convert to inches
+    feetval, inchval = divmod(inchval, 12)  # divide by 12 to get feet, and the remainder inches
+    roundedinchval = trimzeroes(round(inchval, accuracy))
+    return f"{feetval:,}'{roundedinchval}\""
+
+
+def universeScales(base):
+    """kuni..Yuni, each shown until it reaches the next prefix up"""
+    return [(base * Decimal(f"1E{exp + 3}"), base * Decimal(f"1E{exp}"), f"{symbol}uni")
+            for exp, symbol, name in universeprefixes]
+
+
+lengthscales = ScaleTable([
+    ("1E-15", "1E-18", "ym"),
+    ("1E-12", "1E-15", "zm"),
+    ("1E-9", "1E-12", "am"),
+    ("1E-6", "1E-9", "fm"),
+    ("1E-3", "1E-6", "pm"),
+    ("1E0", "1E-3", "nm"),
+    ("1E2", "1E0", "µm"),
+    ("1E4", "1E3", "mm"),
+    ("1E6", "1E4", "cm"),
+    ("1E9", "1E6", "m"),
+    ("1E12", "1E9", "km"),
+    ("1E15", "1E12", "Mm"),
+    ("1E18", "1E15", "Gm"),
+    ("1E21", "1E18", "Tm"),
+    ("1E24", "1E21", "Pm"),
+    ("1E27", "1E24", "Em"),
+    ("1E30", "1E27", "Zm"),
+    (uni, "1E30", "Ym")
+] + universeScales(uni))
+
+lengthscalesUSA = ScaleTable([
+    ("1E-15", "1E-18", "ym"),
+    ("1E-12", "1E-15", "zm"),
+    ("1E-9", "1E-12", "am"),
+    ("1E-6", "1E-9", "fm"),
+    ("1E-3", "1E-6", "pm"),
+    ("1E0", "1E-3", "nm"),
+    ("1E2", "1E0", "µm"),
+    ("1E4", "1E3", "mm"),
+    (foot, inch, "in"),
+    (mile, foot, formatFeetAndInches),
+    (au, mile, "mi"),
+    (ly, au, "AU"),
+    (uni / 10, ly, "ly")
+] + universeScales(uni))
+
+weightscales = ScaleTable([
+    ("1E-18", "1E-21", "yg"),
+    ("1E-15", "1E-18", "zg"),
+    ("1E-12", "1E-15", "ag"),
+    ("1E-9", "1E-12", "fg"),
+    ("1E-6", "1E-9", "pg"),
+    ("1E-3", "1E-6", "ng"),
+    ("1E0", "1E-3", "µg"),
+    ("1E3", "1E0", "mg"),
+    ("1E6", "1E3", "g"),
+    ("1E9", "1E6", "kg"),
+    ("1E12", "1E9", "t"),
+    ("1E15", "1E12", "kt"),
+    ("1E18", "1E15", "Mt"),
+    ("1E21", "1E18", "Gt"),
+    ("1E24", "1E21", "Tt"),
+    ("1E27", "1E24", "Pt"),
+    ("1E30", "1E27", "Et"),
+    ("1E33", "1E30", "Zt"),
+    (uniw, "1E33", "Yt")
+] + universeScales(uniw))
+
+weightscalesUSA = ScaleTable([
+    ("1E-18", "1E-21", "yg"),
+    ("1E-15", "1E-18", "zg"),
+    ("1E-12", "1E-15", "ag"),
+    ("1E-9", "1E-12", "fg"),
+    ("1E-6", "1E-9", "pg"),
+    ("1E-3", "1E-6", "ng"),
+    ("1E0", "1E-3", "µg"),
+    ("1E3", "1E0", "mg"),
+    (ounce / 10, "1E3", "g"),
+    (pound, ounce, "oz"),
+    (uston, pound, "lb"),
+    (earth / 10, uston, " US tons"),
+    (sun / 10, earth, "Earths"),
+    (milkyway, sun, " Suns"),
+    (uniw, milkyway, " Milky Ways")
+] + universeScales(uniw))
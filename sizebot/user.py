@@ -0,0 +1,96 @@
+from decimal import Decimal, Context, localcontext
+
+# Defaults
+defaultheight = Decimal("1754000")  # micrometers
+defaultweight = Decimal("66760000")  # milligrams
+defaultdensity = Decimal("1.0")
+
+# Field indexes in stored user records.
+NICK = 0
+DISP = 1
+CHEI = 2
+BHEI = 3
+BWEI = 4
+DENS = 5
+UNIT = 6
+SPEC = 7
+
+
+def parseDecimal(s, default):
+    if s == "None":
+        return default
+    return Decimal(s)
+
+
+# Records are saved from the store's worker threads, which don't share the main thread's decimal context.
+formatcontext = Context(prec=400, Emin=-9999999, Emax=9999999)
+
+
+def formatDecimal(d):
+    # Round to 18 decimal places and drop trailing zeroes, so stored values don't grow without bound.
+    with localcontext(formatcontext):
+        if d.is_finite() and d.adjusted() < 300:
+            d = round(d, 18).normalize() + 0
+        return str(d)
+
+
+class User:
+    """A SizeBot user. Sizes are Decimals, in micrometers and milligrams."""
+    __slots__ = ["nickname", "display", "height", "baseheight", "baseweight", "density", "unitsystem", "species"]
+
+    def __init__(self, nickname, display=True, height=defaultheight, baseheight=defaultheight,
+                 baseweight=defaultweight, density=defaultdensity, unitsystem="M", species=None):
+        self.nickname = nickname
+        self.display = display
+        self.height = height
+        self.baseheight = baseheight
+        self.baseweight = baseweight
+        self.density = density
+        self.unitsystem = unitsystem
+        self.species = species
+
+    def __repr__(self):
+        return (f"User({self.nickname!r}, display={self.display!r}, height={self.height!r}, "
+                f"baseheight={self.baseheight!r}, baseweight={self.baseweight!r}, density={self.density!r}, "
+                f"unitsystem={self.unitsystem!r}, species={self.species!r})")
+
+    def copy(self):
+        return User(self.nickname, self.display, self.height, self.baseheight,
+                    self.baseweight, self.density, self.unitsystem, self.species)
+
+    @property
+    def multiplier(self):
+        return self.height / self.baseheight
+
+    @property
+    def weight(self):
+        return self.baseweight * self.multiplier ** 3 * self.density
+
+    @classmethod
+    def fromFields(cls, fields):
+        """Build a User from stored fields (see NICK..SPEC)."""
+        baseheight = parseDecimal(fields[BHEI], defaultheight)
+        species = fields[SPEC] if len(fields) > SPEC else "None"
+        return cls(
+            nickname=fields[NICK],
+            display=fields[DISP].strip().upper() == "Y",
+            height=parseDecimal(fields[CHEI], baseheight),
+            baseheight=baseheight,
+            baseweight=parseDecimal(fields[BWEI], defaultweight),
+            density=parseDecimal(fields[DENS], defaultdensity),
+            unitsystem=fields[UNIT].strip().upper(),
+            species=None if species == "None" else species
+        )
+
+    def toFields(self):
+        """The fields to store for this User."""
+        return [
+            self.nickname,
+            "Y" if self.display else "N",
+            formatDecimal(self.height),
+            formatDecimal(self.baseheight),
+            formatDecimal(self.baseweight),
+            str(self.density),
+            self.unitsystem,
+            "None" if self.species is None else self.species
+        ]
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Bounded LRU cache of user records, validated against a stamp (the user file's mtime).
+
+    Records are copied on the way in and out, since callers edit them in place."""
+
+    def __init__(self, maxsize=512, checkinterval=5):
+        self.maxsize = maxsize
+        # How long (in seconds) an entry is trusted before its stamp is checked again.
+        self.checkinterval = checkinterval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # userid -> [stamp, checked, record]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, userid):
+        return str(userid) in self._entries
+
+    def get(self, userid, getstamp):
+        """Return a copy of the cached record, or None.
+
+        getstamp is only called if the entry hasn't been checked within checkinterval."""
+        userid = str(userid)
+        with self._lock:
+            entry = self._entries.get(userid)
+            if entry is None:
+                self.misses += 1
+                return None
+            stamp, checked, record = entry
+            now = time.monotonic()
+            if now - checked >= self.checkinterval:
+                if getstamp() != stamp:
+                    # Changed behind our back.
+                    del self._entries[userid]
+                    self.misses += 1
+                    return None
+                entry[1] = now
+            self._entries.move_to_end(userid)
+            self.hits += 1
+            return record.copy()
+
+    def put(self, userid, stamp, record):
+        userid = str(userid)
+        with self._lock:
+            self._entries[userid] = [stamp, time.monotonic(), record.copy()]
+            self._entries.move_to_end(userid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def restamp(self, userid, stamp):
+        """Record a new stamp for an entry, after we changed the stored copy ourselves."""
+        with self._lock:
+            entry = self._entries.get(str(userid))
+            if entry is not None:
+                entry[0] = stamp
+
+    def invalidate(self, userid):
+        with self._lock:
+            self._entries.pop(str(userid), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        hitrate = self.hits / lookups if lookups else 0
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitrate": hitrate
+        }
+
+    def __str__(self):
+        s = self.stats()
+        return (f"{s['size']}/{s['maxsize']} users cached, "
+                f"{s['hits']} hits, {s['misses']} misses ({s['hitrate']:.1%} hit rate), "
+                f"{s['evictions']} evictions")
@@ -0,0 +1,24 @@
+"""Times compare-style math at the FAST and HIGH tiers. Run from the top folder: python -m tests.benchmark_precision [number]"""
+import sys
+import timeit
+from decimal import localcontext
+
+from sizebot.precision import FAST, HIGH, tierFor
+from sizebot.user import defaultheight
+from tests.test_precision import compare, pairs
+
+
+def benchmark(number=2000):
+    # Only the pairs SizeBot would work out at FAST; the rest need HIGH either way.
+    fastpairs = [(a, b) for a, b in pairs if tierFor(a, b, defaultheight) is FAST]
+    results = {}
+    for name, ctx in (("HIGH", HIGH), ("FAST", FAST)):
+        with localcontext(ctx):
+            results[name] = [compare(a, b) for a, b in fastpairs]
+            elapsed = timeit.timeit(lambda: [compare(a, b) for a, b in fastpairs], number=number)
+        print(f"{name} (prec={ctx.prec}): {elapsed:.3f}s for {number * len(fastpairs)} compares")
+    print("Rendered output identical." if results["HIGH"] == results["FAST"] else "Rendered output differs!")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
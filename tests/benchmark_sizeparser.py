@@ -0,0 +1,23 @@
+"""Times parseHeight against the pipeline it replaced. Run from the top folder: python -m tests.benchmark_sizeparser [number]"""
+import sys
+import timeit
+
+from sizebot.sizeparser import parseHeight
+from tests.test_sizeparser import oldParseHeight, samples
+
+
+def benchmark(number=20000):
+    for sample in samples:
+        old = oldParseHeight(sample)
+        new = parseHeight(sample)
+        if old != new:
+            print(f"Mismatch on {sample!r}: {old} != {new}")
+    oldtime = timeit.timeit(lambda: [oldParseHeight(s) for s in samples], number=number)
+    newtime = timeit.timeit(lambda: [parseHeight(s) for s in samples], number=number)
+    total = number * len(samples)
+    print(f"Old pipeline: {oldtime:.3f}s for {total} parses ({oldtime / total * 1e6:.2f}µs each)")
+    print(f"Single pass:  {newtime:.3f}s for {total} parses ({newtime / total * 1e6:.2f}µs each)")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def sizebotdir(tmp_path_factory):
+    """A scratch folder to run SizeBot from. Its parent holds an empty users folder, like a fresh install."""
+    root = tmp_path_factory.mktemp("sizebot")
+    (root / "users").mkdir()
+    (root / "run").mkdir()
+    return root / "run"
+
+
+@pytest.fixture(scope="session")
+def globalsb(sizebotdir):
+    """sizebot.globalsb, imported from the scratch folder so it opens an empty user store."""
+    pytest.importorskip("discord")
+    pytest.importorskip("colored")
+    cwd = os.getcwd()
+    os.chdir(sizebotdir)
+    try:
+        import sizebot.globalsb
+    finally:
+        os.chdir(cwd)
+    return sizebot.globalsb
+
+
+@pytest.fixture(scope="session")
+def change(globalsb):
+    import sizebot.cogs.change
+    return sizebot.cogs.change
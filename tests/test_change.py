@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+import pytest
+
+from sizebot.sizeparser import SizeParseError
+
+
+@pytest.mark.parametrize("style,amount,expected", [
+    ("+", "1m", ("add", Decimal("1E6"))),
+    ("sub", "1m", ("add", Decimal("-1E6"))),
+    ("x", "2", ("multiply", Decimal("2"))),
+    ("divide", "1,000", ("divide", Decimal("1000")))
+])
+def test_parseChange(change, style, amount, expected):
+    assert change.parseChange(style, amount) == expected
+
+
+@pytest.mark.parametrize("style,amount", [
+    ("x", "nan"),
+    ("x", "snan"),
+    ("/", "inf"),
+    ("x", "-Infinity"),
+    ("x", "0"),
+    ("x", "-2"),
+    ("/", "0"),
+    ("/", "-2"),
+    ("x", "two"),
+    ("+", "nan m")
+])
+def test_parseChange_rejects(change, style, amount):
+    with pytest.raises(SizeParseError):
+        change.parseChange(style, amount)
+
+
+def test_applyChanges_caps_only_at_the_end(change):
+    height = Decimal("1754000")
+    steps = change.parseChangeExpression("x1e100 /1e100")
+    assert change.applyChanges(height, steps) == (height, False)
+
+
+def test_applyChanges_too_big(change):
+    steps = change.parseChangeExpression("x1e100")
+    assert change.applyChanges(Decimal("1754000"), steps) == (change.infinity, True)
+
+
+def test_applyChanges_overflow(change):
+    steps = change.parseChangeExpression("x1e999990 x1e999990 /2")
+    assert change.applyChanges(Decimal("1754000"), steps) == (change.infinity, True)
+
+
+def test_applyChanges_chain(change):
+    steps = change.parseChangeExpression("x2 +1m /3")
+    height, toobig = change.applyChanges(Decimal("1754000"), steps)
+    assert not toobig
+    assert height == Decimal("4508000") / 3
+
+
+@pytest.mark.parametrize("expression", ["x nan", "x2 /nan", "/ inf", "x2 x snan"])
+def test_parseChangeExpression_rejects_non_finite(change, expression):
+    with pytest.raises(SizeParseError):
+        change.parseChangeExpression(expression)
+
+
+@pytest.mark.parametrize("expression,expected", [
+    ("a -1ft", [("add", Decimal("-304800"))]),
+    ("+ -1ft", [("add", Decimal("-304800"))]),
+    ("s -1m", [("add", Decimal("1E6"))]),
+    ("x2 +1ft", [("multiply", Decimal("2")), ("add", Decimal("304800"))]),
+    ("x2 -1ft", [("multiply", Decimal("2")), ("add", Decimal("-304800"))]),
+    ("a 5ft 3in", [("add", Decimal("1600200"))])
+])
+def test_parseChangeExpression(change, expression, expected):
+    assert change.parseChangeExpression(expression) == expected
+
+
+def test_signed_factor(change):
+    with pytest.raises(SizeParseError) as e:
+        change.parseChangeExpression("x -2")
+    assert e.value.reason == "Can't multiply by zero or less"
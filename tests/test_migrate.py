@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("colored")
+
+from sizebot.migrate import migrate  # noqa: E402
+from sizebot.storage import SQLiteUserStore  # noqa: E402
+
+
+def writeUser(folder, userid, lines):
+    (folder / "users" / f"{userid}.txt").write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def folder(tmp_path):
+    (tmp_path / "users").mkdir()
+    return tmp_path
+
+
+def test_migrate_fills_in_old_records(folder):
+    writeUser(folder, 1, ["Old", "Y", "1754000", "1754000", "66760000", "1.0", "M"])
+    writeUser(folder, 2, ["Blank", "Y", "1754000", "1754000", "66760000", "1.0", "M", "Fox", ""])
+    assert migrate(folder) == 2
+    store = SQLiteUserStore(folder / "users.db")
+    try:
+        assert dict(store.records()) == {
+            "1": ["Old", "Y", "1754000", "1754000", "66760000", "1.0", "M", "None"],
+            "2": ["Blank", "Y", "1754000", "1754000", "66760000", "1.0", "M", "Fox"]
+        }
+    finally:
+        store.close()
+
+
+def test_failed_migrate_leaves_no_database(folder):
+    writeUser(folder, 1, ["Good", "Y", "1754000", "1754000", "66760000", "1.0", "M", "None"])
+    writeUser(folder, 2, ["Bad"])
+    with pytest.raises(IndexError):
+        migrate(folder)
+    assert sorted(p.name for p in folder.iterdir()) == ["users"]
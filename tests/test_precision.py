@@ -0,0 +1,58 @@
+from decimal import Decimal, localcontext
+
+import pytest
+
+from sizebot.precision import FAST, HIGH, tierFor
+from sizebot.units import lengthscales, weightscales
+from sizebot.user import defaultheight, formatDecimal
+
+heights = [
+    Decimal("1754000"),
+    Decimal("2.5E7") / 3,
+    Decimal("1234.5678"),
+    Decimal("9.1E10") / 7,
+    Decimal("0.001"),
+    Decimal("1E18") / 7
+]
+
+pairs = [(a, b) for a in heights for b in heights if a != b]
+
+
+def compare(a, b):
+    """The math &compare does, rendered the way it shows it."""
+    mult = a / b
+    cubed = mult ** 3
+    weight = Decimal("66760000") * cubed
+    return (lengthscales.format(a / Decimal(7), 3), lengthscales.format(b * mult, 3),
+            weightscales.format(weight, 1), str(round(mult, 4)), str(round(cubed, 4)))
+
+
+def rendered(ctx, f, *args):
+    with localcontext(ctx):
+        return f(*args)
+
+
+@pytest.mark.parametrize("a,b", pairs)
+def test_compare_same_at_both_tiers(a, b):
+    ctx = tierFor(a, b, defaultheight)
+    assert rendered(ctx, compare, a, b) == rendered(HIGH, compare, a, b)
+
+
+@pytest.mark.parametrize("value", heights)
+def test_formatDecimal_same_at_both_tiers(value):
+    scaled = [value * 3, value / 3, value ** 2]
+    assert rendered(FAST, lambda: [formatDecimal(v) for v in scaled]) == rendered(HIGH, lambda: [formatDecimal(v) for v in scaled])
+
+
+@pytest.mark.parametrize("value", heights)
+def test_fromSV_same_at_both_tiers(globalsb, value):
+    def show():
+        return [globalsb.fromSV(value * 3), globalsb.fromSVUSA(value / 3), globalsb.fromSVacc(value)]
+    assert rendered(FAST, show) == rendered(HIGH, show)
+
+
+def test_tierFor():
+    assert tierFor(defaultheight) is FAST
+    assert tierFor(Decimal(0), Decimal("Infinity")) is FAST
+    assert tierFor(Decimal("1E40")) is HIGH
+    assert tierFor(Decimal("1E-20"), Decimal("1E20")) is HIGH
@@ -0,0 +1,24 @@
+import pytest
+
+from sizebot.roller import roll, RollException
+
+
+@pytest.mark.parametrize("argstring,total", [
+    ("2+3", 5),
+    ("-" * 2 + "1", 1),
+    ("2**10", 1024)
+])
+def test_roll_math(argstring, total):
+    assert roll(argstring).total == total
+
+
+@pytest.mark.parametrize("argstring", [
+    "-" * 1500 + "1",
+    "(" * 1500 + "1" + ")" * 1500,
+    "1/0",
+    "9**9**9",
+    "__import__('os')"
+], ids=["minuses", "brackets", "divide by zero", "huge power", "names"])
+def test_bad_rolls(argstring):
+    with pytest.raises(RollException):
+        roll(argstring)
@@ -0,0 +1,65 @@
+import re
+from decimal import Decimal
+
+import pytest
+
+from sizebot.sizeparser import parseHeight, parseWeight, SizeParseError
+from sizebot.units import lengths
+
+# Sizes both parsers understand, also used by benchmark_sizeparser.
+samples = ["5'3\"", "5ft3in", "175.4cm", "10m", "2uni", "12in", "1.5mi", "3Ym"]
+
+
+def oldParseHeight(string):
+    # The getnum/getlet/isFeetAndInchesAndIfSoFixIt pipeline parseHeight replaced.
+    def getnum(string):
+        match = re.search(r"\d+\.?\d*", string)
+        if match is None:
+            return None
+        return Decimal(match.group(0))
+
+    def getlet(string):
+        match = re.search(r"[a-zA-Z\'\"]+", string)
+        if match is None:
+            return None
+        return match.group(0)
+
+    m = re.match(r"^(?P<feet>\d+(ft|foot|feet|\'))(?P<inch>\d+(in|\")*)", string, flags=re.I)
+    if m:
+        feet = getnum(m.group('feet')) or 0
+        inch = getnum(m.group('inch')) or 0
+        string = f"{(feet * 12) + inch}in"
+    return lengths.convert(getnum(string), getlet(string))
+
+
+@pytest.mark.parametrize("text", samples)
+def test_matches_old_parser(text):
+    assert parseHeight(text) == oldParseHeight(text)
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("5 feet 3 inches", Decimal("1600200")),
+    ("1,000m", Decimal("1E9")),
+    (".5m", Decimal("5E5")),
+    ("2.5E-3m", Decimal("2500"))
+])
+def test_parseHeight(text, expected):
+    assert parseHeight(text) == expected
+
+
+@pytest.mark.parametrize("text,reason", [
+    ("tall", "Not a size"),
+    ("10", "Missing unit"),
+    ("10 furlongs", "Unknown unit 'furlongs'"),
+    ("1e99999999m", "Too big"),
+    ("1e99999999ft 1in", "Too big")
+])
+def test_bad_heights(text, reason):
+    with pytest.raises(SizeParseError) as e:
+        parseHeight(text)
+    assert e.value.reason == reason
+
+
+def test_bad_weight():
+    with pytest.raises(SizeParseError):
+        parseWeight("1e99999999kg")
@@ -0,0 +1,63 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+from sizebot.slowchange import SlowChangeState
+from sizebot.user import User
+
+
+@pytest.fixture
+def slowchanger(globalsb, sizebotdir, monkeypatch):
+    # The stores' paths are relative to where SizeBot was started.
+    monkeypatch.chdir(sizebotdir)
+    user_id = "1000"
+    globalsb.userstore.write(user_id, User("Slow").toFields())
+    globalsb.registered.add(user_id)
+    yield user_id
+    globalsb.slowchangestates.pop(user_id, None)
+    globalsb.jobstore.delete(globalsb.slowChangeKey(user_id))
+    globalsb.registered.discard(user_id)
+    globalsb.unindexUser(user_id)
+    globalsb.userstore.delete(user_id)
+
+
+def spec(user_id, **state):
+    state = {"startheight": "1754000", "kind": "multiply", "amount": "2", "period": 60, "starttime": time.time(), **state}
+    return {"type": "slowchange", "userid": user_id, "guildid": None, "channelid": None, "state": state}
+
+
+def test_loadSlowChanges(globalsb, slowchanger):
+    key = globalsb.slowChangeKey(slowchanger)
+    globalsb.jobstore.put(key, spec(slowchanger))
+    globalsb.loadSlowChanges()
+    assert isinstance(globalsb.slowchangestates[slowchanger], SlowChangeState)
+    assert globalsb.heightindex.get(slowchanger) == Decimal("3508000")
+
+
+@pytest.mark.parametrize("state", [
+    {"amount": "NaN"},
+    {"amount": "sNaN"},
+    {"startheight": "Infinity"},
+    {"amount": "two"},
+    {"kind": None}
+])
+def test_loadSlowChanges_drops_bad_specs(globalsb, slowchanger, state):
+    key = globalsb.slowChangeKey(slowchanger)
+    globalsb.jobstore.put(key, spec(slowchanger, **state))
+    globalsb.loadSlowChanges()
+    assert slowchanger not in globalsb.slowchangestates
+    assert globalsb.jobstore.get(key) is None
+
+
+@pytest.mark.parametrize("kind,amount,steps,expected", [
+    ("add", "1000", 10, Decimal("1764000")),
+    ("multiply", "2", 10, Decimal("1754000") * 2 ** 10),
+    ("divide", "2", 10, Decimal("1754000") / 2 ** 10),
+    ("multiply", "1E100", 10000, Decimal("1E60")),
+    ("divide", "0.5", 10000, Decimal("1E60")),
+    ("divide", "1E2000", 10000, Decimal(0))
+])
+def test_heightAt(kind, amount, steps, expected):
+    state = SlowChangeState(Decimal("1754000"), kind, Decimal(amount), 36, 0)
+    assert state.heightAt(36 * (steps - 1), Decimal("1E60")) == expected
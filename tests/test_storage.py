@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+pytest.importorskip("colored")
+
+from sizebot.storage import TextUserStore, WriteBehind  # noqa: E402
+
+record = ["Someone", "Y", "1754000", "1754000", "66760000", "1.0", "M", "None"]
+
+
+@pytest.fixture
+def userstore(tmp_path):
+    return TextUserStore(tmp_path)
+
+
+def test_delete_unflushed(userstore):
+    writebehind = WriteBehind(userstore.write, window=60)
+    writebehind.put(1, record)
+    writebehind.delete(1, userstore.delete)
+    writebehind.flush()
+    assert not userstore.exists("1")
+
+
+def test_delete_waits_for_flush(userstore):
+    writing = threading.Event()
+    carryon = threading.Event()
+
+    def slowwrite(userid, fields):
+        writing.set()
+        carryon.wait(5)
+        userstore.write(userid, fields)
+
+    writebehind = WriteBehind(slowwrite, window=60)
+    writebehind.put(1, record)
+    flusher = threading.Thread(target=writebehind.flush)
+    flusher.start()
+    writing.wait(5)
+    deleter = threading.Thread(target=writebehind.delete, args=(1, userstore.delete))
+    deleter.start()
+    carryon.set()
+    flusher.join(5)
+    deleter.join(5)
+    assert not userstore.exists("1")